@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+# STREAMING BATCH ANALYSIS
+
+# Scores a file of positions (one FEN or packed position per line, see the notation file) with
+# the alpha-beta search and writes one JSON object per position (JSONL) with the best move, the
+# eval and the node counts. Blank lines and lines starting with "#" are skipped, and a line that
+# can't be read gets an "error" field instead of a result.
+
+# The positions are streamed: lines are read in chunks, each chunk is searched by a worker
+# process, and only a fixed number of chunks per worker are in flight at a time. The results are
+# written in input order as soon as the oldest chunk is done, so memory use stays the same no
+# matter how big the input file is.
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from checkers_engine_mechanics import OPPOSING_PIECE_COLORS, format_move
+from checkers_engine_notation import FEN_SIDE_LETTERS, parse_position_line
+from checkers_engine_hashing import TranspositionTable
+from checkers_engine_move_ordering import MoveOrdering
+from checkers_engine_search import alpha_beta_best_move_search
+
+DEFAULT_ANALYSIS_DEPTH = 6
+DEFAULT_CHUNK_SIZE = 32
+PENDING_CHUNKS_PER_WORKER = 4
+
+ANALYSIS_TRANSPOSITION_TABLE_SIZE = 1 << 14
+
+# WORKER FUNCTIONS:
+
+# Every position gets a fresh transposition table and move ordering, so its result doesn't depend
+# on which other positions happened to be searched by the same worker before it.
+
+def analyze_position(board_position, piece_color, depth, time_limit=None):
+    search_result = alpha_beta_best_move_search(board_position, piece_color,
+                                                OPPOSING_PIECE_COLORS[piece_color],
+                                                max_depth=depth,
+                                                transposition_table=TranspositionTable(
+                                                    ANALYSIS_TRANSPOSITION_TABLE_SIZE),
+                                                move_ordering=MoveOrdering(),
+                                                time_limit=time_limit)
+    best_move = search_result.best_move
+    return {
+        "side": FEN_SIDE_LETTERS[piece_color],
+        "best_move": format_move(best_move) if best_move is not None else None,
+        "eval": search_result.best_eval,
+        "depth": search_result.depth,
+        "nodes": search_result.nodes,
+        "quiescence_nodes": search_result.quiescence_nodes
+    }
+
+def analyze_position_line(line_number, position_line, depth, time_limit=None):
+    analysis = {"line": line_number, "position": position_line}
+    try:
+        board_position, piece_color = parse_position_line(position_line)
+    except ValueError as error:
+        analysis["error"] = str(error)
+        return analysis
+    analysis.update(analyze_position(board_position, piece_color, depth, time_limit))
+    return analysis
+
+# The results are turned into JSON text in the worker, so the main process only has to write them.
+
+def analyze_position_chunk(numbered_position_lines, depth, time_limit=None):
+    return [json.dumps(analyze_position_line(line_number, position_line, depth, time_limit))
+            for line_number, position_line in numbered_position_lines]
+
+# STREAMING FUNCTIONS:
+
+def read_numbered_position_lines(input_file):
+    for line_number, line in enumerate(input_file, 1):
+        position_line = line.strip()
+        if position_line and not position_line.startswith("#"):
+            yield (line_number, position_line)
+
+def read_position_chunks(input_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    numbered_position_lines = read_numbered_position_lines(input_file)
+    while True:
+        position_chunk = list(islice(numbered_position_lines, chunk_size))
+        if not position_chunk:
+            return
+        yield position_chunk
+
+# Returns the number of positions written.
+
+def stream_position_analysis(input_file, output_file, depth=DEFAULT_ANALYSIS_DEPTH,
+                             worker_count=None, chunk_size=DEFAULT_CHUNK_SIZE, time_limit=None):
+    if worker_count is None:
+        worker_count = os.cpu_count() or 1
+    max_pending_chunks = worker_count * PENDING_CHUNKS_PER_WORKER
+    pending_chunks = deque()
+    written_count = 0
+
+    def write_oldest_chunk():
+        result_lines = pending_chunks.popleft().result()
+        for result_line in result_lines:
+            output_file.write(result_line + "\n")
+        return len(result_lines)
+
+    with ProcessPoolExecutor(max_workers=worker_count) as analysis_pool:
+        for position_chunk in read_position_chunks(input_file, chunk_size):
+            if len(pending_chunks) >= max_pending_chunks:
+                written_count += write_oldest_chunk()
+            pending_chunks.append(analysis_pool.submit(analyze_position_chunk, position_chunk,
+                                                       depth, time_limit))
+        while pending_chunks:
+            written_count += write_oldest_chunk()
+    output_file.flush()
+    return written_count
+
+# Example: checkers_engine_analysis.py positions.txt results.jsonl --depth 8 --workers 8
+# (use "-" for either path to read from stdin or write to stdout)
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="Score a file of positions as JSONL.")
+    argument_parser.add_argument("input_path", help="one FEN or packed position per line")
+    argument_parser.add_argument("output_path", nargs="?", default="-")
+    argument_parser.add_argument("--depth", type=int, default=DEFAULT_ANALYSIS_DEPTH)
+    argument_parser.add_argument("--time-limit", type=float, default=None,
+                                 help="seconds per position (the depth still applies)")
+    argument_parser.add_argument("--workers", type=int, default=None)
+    argument_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    arguments = argument_parser.parse_args()
+    input_file = sys.stdin if arguments.input_path == "-" else open(arguments.input_path)
+    output_file = sys.stdout if arguments.output_path == "-" else open(arguments.output_path, "w")
+    try:
+        stream_position_analysis(input_file, output_file, arguments.depth, arguments.workers,
+                                 arguments.chunk_size, arguments.time_limit)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
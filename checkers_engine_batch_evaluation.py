@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+# BATCH POSITION EVALUATION (NUMPY)
+
+# For analysis and tuning jobs, positions are scored many thousands at a time. Instead of calling
+# evaluate_material_balance once per board, the boards are stacked into an (N, 32) array of
+# uint8 square values (the same bitmask encoding used everywhere else: BLACK_PIECE, RED_PIECE,
+# IS_KING and ON_BACK_RANK) and every position is scored in a single vectorized pass.
+
+# Note: numpy is only needed by this file and the position records file. The rest of the engine
+# does not depend on it.
+
+import numpy as np
+
+from checkers_engine_mechanics import IS_KING, ON_BACK_RANK, KING_WEIGHT
+
+PIECE_VALUE_MASK = np.uint8(~ON_BACK_RANK & 0xFF)
+
+# BOARD ARRAY FUNCTIONS:
+
+def convert_board_positions_to_array(board_positions):
+    board_array = np.asarray(board_positions, dtype=np.uint8)
+    if board_array.ndim != 2 or board_array.shape[1] != 32:
+        raise ValueError(f"expected an (N, 32) array of square values, got shape {board_array.shape}")
+    return board_array
+
+# BATCH EVALUATION FUNCTIONS:
+
+# These match get_material_count and evaluate_material_balance in the main engine file exactly:
+# a square counts as a pawn or king of a color when its value without back rank info is equal to
+# that piece value.
+
+def get_material_count_batch(piece_values, piece_color):
+    pawn_counts = np.count_nonzero(piece_values == piece_color, axis=1)
+    king_counts = np.count_nonzero(piece_values == piece_color + IS_KING, axis=1)
+    return pawn_counts.astype(np.int32) + KING_WEIGHT * king_counts.astype(np.int32)
+
+def evaluate_material_balance_batch(board_positions, F_piece_color, E_piece_color):
+    board_array = convert_board_positions_to_array(board_positions)
+    piece_values = board_array & PIECE_VALUE_MASK
+    F_material_counts = get_material_count_batch(piece_values, F_piece_color)
+    E_material_counts = get_material_count_batch(piece_values, E_piece_color)
+    return F_material_counts - E_material_counts
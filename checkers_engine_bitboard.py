@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+
+# BITBOARD POSITION REPRESENTATION
+
+# A bitboard position stores the whole board in three 32-bit integers (one for the black pieces,
+# one for the red pieces and one for the kings of either color). Bit (coordinate - 1) is set
+# when the corresponding coordinate holds that kind of piece, so coordinate 1 is bit 0 and
+# coordinate 32 is bit 31. Moves are found with shifts and masks over the whole board at once
+# instead of scanning all 32 squares for every piece.
+
+from checkers_engine_mechanics import (
+    BLACK_PIECE, RED_PIECE, IS_KING,
+    MOVE_COORDINATE_MASK, MOVE_END_SHIFT, MOVE_CAPTURE_SHIFT,
+    generate_empty_board, encode_move
+)
+
+class BitboardPosition:
+    def __init__(self, black, red, kings):
+        self.black = black
+        self.red = red
+        self.kings = kings
+
+    def copy(self):
+        return BitboardPosition(self.black, self.red, self.kings)
+
+    def __eq__(self, other):
+        return isinstance(other, BitboardPosition) and \
+               (self.black, self.red, self.kings) == (other.black, other.red, other.kings)
+
+    def __hash__(self):
+        return hash((self.black, self.red, self.kings))
+
+    def __str__(self):
+        return f"black={self.black:08x} red={self.red:08x} kings={self.kings:08x}"
+
+# BOARD MASK CONSTANTS:
+
+# "Even" rows are the 1st, 3rd, 5th and 7th physical rows (the coordinates in these rows sit in
+# physical columns 2, 4, 6 and 8), while "odd" rows are the 2nd, 4th, 6th and 8th physical rows.
+
+ALL_SQUARES = 0xFFFFFFFF
+
+EVEN_ROWS = 0x0F0F0F0F
+ODD_ROWS = 0xF0F0F0F0
+
+LEFT_EDGE = 0x10101010
+RIGHT_EDGE = 0x08080808
+
+TOP_ROW = 0x0000000F
+BOTTOM_ROW = 0xF0000000
+
+BACK_RANKS = TOP_ROW | BOTTOM_ROW
+
+# BOARD CONVERSION FUNCTIONS:
+
+def coordinate_to_bit(coordinate):
+    return 1 << (coordinate - 1)
+
+def bit_to_coordinate(bit):
+    return bit.bit_length()
+
+def iterate_bits(bitboard):
+    while bitboard:
+        bit = bitboard & -bitboard
+        yield bit
+        bitboard ^= bit
+
+def convert_board_to_bitboards(board_position):
+    black = 0
+    red = 0
+    kings = 0
+    for index, square_value in enumerate(board_position):
+        bit = 1 << index
+        if square_value & BLACK_PIECE:
+            black |= bit
+        elif square_value & RED_PIECE:
+            red |= bit
+        if square_value & IS_KING:
+            kings |= bit
+    return BitboardPosition(black, red, kings)
+
+def convert_bitboards_to_board(bitboard_position):
+    board_position = generate_empty_board()
+    for index in range(32):
+        bit = 1 << index
+        if bitboard_position.black & bit:
+            board_position[index] |= BLACK_PIECE
+        elif bitboard_position.red & bit:
+            board_position[index] |= RED_PIECE
+        if bitboard_position.kings & bit:
+            board_position[index] |= IS_KING
+    return board_position
+
+# SHIFT FUNCTIONS:
+
+# Each shift function moves every bit in the given bitboard one square in the named direction,
+# dropping any bit that would leave the board.
+
+def DL_shift(bitboard):
+    return ((bitboard & EVEN_ROWS) << 4 |
+            (bitboard & ODD_ROWS & ~LEFT_EDGE & ~BOTTOM_ROW) << 3) & ALL_SQUARES
+
+def DR_shift(bitboard):
+    return ((bitboard & EVEN_ROWS & ~RIGHT_EDGE) << 5 |
+            (bitboard & ODD_ROWS & ~BOTTOM_ROW) << 4) & ALL_SQUARES
+
+def UL_shift(bitboard):
+    return ((bitboard & EVEN_ROWS & ~TOP_ROW) >> 4 |
+            (bitboard & ODD_ROWS & ~LEFT_EDGE) >> 5)
+
+def UR_shift(bitboard):
+    return ((bitboard & EVEN_ROWS & ~TOP_ROW & ~RIGHT_EDGE) >> 3 |
+            (bitboard & ODD_ROWS) >> 4)
+
+# SHIFT CONSTANTS:
+
+# Each entry pairs a shift with the shift that undoes it, and the direction lists are ordered
+# the same way as the searchers in the main engine file (left before right, down before up).
+
+DL = (DL_shift, UR_shift)
+DR = (DR_shift, UL_shift)
+UL = (UL_shift, DR_shift)
+UR = (UR_shift, DL_shift)
+
+FORWARD = 0
+BACKWARD = 1
+
+SHIFTERS = {
+    "down": (DL, DR),
+    "up": (UL, UR)
+}
+
+KING_SHIFTERS = (DL, DR, UL, UR)
+
+# PIECE LOCATION FUNCTIONS:
+
+def get_friendly_and_enemy_bitboards(bitboard_position, piece_color):
+    if piece_color == BLACK_PIECE:
+        return (bitboard_position.black, bitboard_position.red)
+    else:
+        return (bitboard_position.red, bitboard_position.black)
+
+def get_empty_bitboard(bitboard_position):
+    return ~(bitboard_position.black | bitboard_position.red) & ALL_SQUARES
+
+# BITBOARD SIMPLE MOVE FUNCTIONS:
+
+def find_bitboard_simples_for_pieces(pieces, empty, shifters):
+    simples = []
+    movable_by_direction = [shifter[BACKWARD](empty) & pieces for shifter in shifters]
+    movable = 0
+    for movable_in_direction in movable_by_direction:
+        movable |= movable_in_direction
+    for bit in iterate_bits(movable):
+        coordinate = bit_to_coordinate(bit)
+        for shifter, movable_in_direction in zip(shifters, movable_by_direction):
+            if movable_in_direction & bit:
+                destination_coordinate = bit_to_coordinate(shifter[FORWARD](bit))
+                simples.append(encode_move(coordinate, destination_coordinate))
+    return simples
+
+def find_all_bitboard_simples(bitboard_position, piece_color, vertical_search_direction):
+    friendly, enemy = get_friendly_and_enemy_bitboards(bitboard_position, piece_color)
+    empty = get_empty_bitboard(bitboard_position)
+    pawns = friendly & ~bitboard_position.kings
+    kings = friendly & bitboard_position.kings
+    simples = []
+    if pawns:
+        simples.extend(find_bitboard_simples_for_pieces(pawns, empty,
+                                                        SHIFTERS[vertical_search_direction]))
+    if kings:
+        simples.extend(find_bitboard_simples_for_pieces(kings, empty, KING_SHIFTERS))
+    return simples
+
+# BITBOARD JUMP MOVE FUNCTIONS:
+
+# A piece can jump in a direction when the neighboring square holds an enemy piece and the square
+# behind that is empty. Running the test backwards from the empty squares finds every piece that
+# can start a jump in one pass.
+
+def find_bitboard_jumpers(pieces, enemy, empty, shifters):
+    jumpers = 0
+    for shifter in shifters:
+        jumpers |= shifter[BACKWARD](shifter[BACKWARD](empty) & enemy) & pieces
+    return jumpers
+
+# Note: the jumping piece is lifted off its start square for the whole chain, so a king may land
+# back on the square it started from. Captured pieces stay on the board until the move is
+# played, which stops them from being jumped twice. Since bit (coordinate - 1) stands for the
+# same coordinate here as in a move's capture mask, the bitboard of captured pieces is used as
+# the capture mask of the finished move directly. A king that captures the same pieces in a
+# different order and finishes on the same coordinate gives the same move, so duplicate moves
+# are dropped (see calculate_king_paths in the main engine file).
+
+def extend_bitboard_jump_path(start_coordinate, current_bit, capture_mask,
+                              enemy, empty, shifters, finished_paths):
+    extended = False
+    for shifter in shifters:
+        jumpee_bit = shifter[FORWARD](current_bit)
+        if jumpee_bit & enemy and not jumpee_bit & capture_mask:
+            destination_bit = shifter[FORWARD](jumpee_bit)
+            if destination_bit & empty:
+                extended = True
+                extend_bitboard_jump_path(start_coordinate, destination_bit,
+                                          capture_mask | jumpee_bit, enemy, empty,
+                                          shifters, finished_paths)
+    if not extended and capture_mask:
+        finished_paths.append(encode_move(start_coordinate, bit_to_coordinate(current_bit),
+                                          capture_mask))
+
+def find_bitboard_jump_paths_for_pieces(pieces, enemy, empty, shifters):
+    jump_paths = []
+    for bit in iterate_bits(find_bitboard_jumpers(pieces, enemy, empty, shifters)):
+        extend_bitboard_jump_path(bit_to_coordinate(bit), bit, 0, enemy, empty | bit,
+                                  shifters, jump_paths)
+    return list(dict.fromkeys(jump_paths))
+
+def list_all_bitboard_jump_moves(bitboard_position, piece_color, vertical_search_direction):
+    friendly, enemy = get_friendly_and_enemy_bitboards(bitboard_position, piece_color)
+    empty = get_empty_bitboard(bitboard_position)
+    pawns = friendly & ~bitboard_position.kings
+    kings = friendly & bitboard_position.kings
+    jump_moves = []
+    if pawns:
+        jump_moves.extend(find_bitboard_jump_paths_for_pieces(pawns, enemy, empty,
+                                                              SHIFTERS[vertical_search_direction]))
+    if kings:
+        jump_moves.extend(find_bitboard_jump_paths_for_pieces(kings, enemy, empty, KING_SHIFTERS))
+    return jump_moves
+
+# LIST ALL POSSIBLE MOVES FUNCTION:
+
+# The returned moves use the same encoding as list_all_possible_moves in the main engine file.
+
+def list_all_possible_bitboard_moves(bitboard_position, piece_color, vertical_search_direction):
+    jump_moves = list_all_bitboard_jump_moves(bitboard_position, piece_color,
+                                              vertical_search_direction)
+    if jump_moves:
+        return jump_moves
+    return find_all_bitboard_simples(bitboard_position, piece_color, vertical_search_direction)
+
+# BITBOARD UPDATE FUNCTIONS:
+
+def update_bitboards_for_start_and_end_coordinates(start_coordinate, end_coordinate,
+                                                    bitboard_position):
+    start_bit = coordinate_to_bit(start_coordinate)
+    end_bit = coordinate_to_bit(end_coordinate)
+    piece_is_king = bitboard_position.kings & start_bit
+    if bitboard_position.black & start_bit:
+        bitboard_position.black = bitboard_position.black & ~start_bit | end_bit
+    else:
+        bitboard_position.red = bitboard_position.red & ~start_bit | end_bit
+    bitboard_position.kings &= ~start_bit
+    if piece_is_king or end_bit & BACK_RANKS:
+        bitboard_position.kings |= end_bit
+
+def update_bitboard_position(selected_move, bitboard_position):
+    update_bitboards_for_start_and_end_coordinates(selected_move & MOVE_COORDINATE_MASK,
+                                                    selected_move >> MOVE_END_SHIFT & MOVE_COORDINATE_MASK,
+                                                    bitboard_position)
+    capture_mask = selected_move >> MOVE_CAPTURE_SHIFT
+    if capture_mask:
+        bitboard_position.black &= ~capture_mask
+        bitboard_position.red &= ~capture_mask
+        bitboard_position.kings &= ~capture_mask
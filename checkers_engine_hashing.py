@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+# ZOBRIST HASHING AND TRANSPOSITION TABLE
+
+# A Zobrist key is a 64-bit number that identifies a board position (plus the side to move).
+# Every (coordinate, piece) pair gets its own random 64-bit number, and the key of a position is
+# all of the numbers for its pieces XORed together. Because XOR undoes itself, a move only has to
+# XOR out the pieces it removes and XOR in the pieces it places, which means the key can be kept
+# up to date as moves are played instead of being recomputed from all 32 squares.
+
+import random
+
+from checkers_engine_mechanics import (
+    BLACK_PIECE, RED_PIECE, IS_KING, ON_BACK_RANK, BLACK_KING, RED_KING,
+    MOVE_COORDINATE_MASK, MOVE_END_SHIFT, MOVE_CAPTURE_SHIFT,
+    get_square_value
+)
+
+# ZOBRIST KEY CONSTANTS:
+
+# The seed is fixed so that keys are the same every time the program runs (the opening book and
+# any other files keyed by position hash depend on this).
+
+ZOBRIST_SEED = 20240101
+
+def generate_zobrist_piece_keys():
+    key_generator = random.Random(ZOBRIST_SEED)
+    zobrist_piece_keys = [None]
+    for coordinate in range(1, 33):
+        coordinate_keys = {}
+        for piece_value in (BLACK_PIECE, RED_PIECE, BLACK_KING, RED_KING):
+            coordinate_keys[piece_value] = key_generator.getrandbits(64)
+        zobrist_piece_keys.append(coordinate_keys)
+    return (tuple(zobrist_piece_keys), key_generator.getrandbits(64))
+
+# Note: ZOBRIST_PIECE_KEYS is indexed by coordinate (index 0 is unused) and then by the piece value
+# without back rank info. ZOBRIST_RED_TO_MOVE_KEY is XORed in whenever it is red's turn.
+
+ZOBRIST_PIECE_KEYS, ZOBRIST_RED_TO_MOVE_KEY = generate_zobrist_piece_keys()
+
+# ZOBRIST KEY FUNCTIONS:
+
+def compute_zobrist_key(board_position, piece_color_to_move):
+    zobrist_key = 0
+    for coordinate in range(1, 33):
+        piece_value = get_square_value(coordinate, board_position) & ~ON_BACK_RANK
+        if piece_value:
+            zobrist_key ^= ZOBRIST_PIECE_KEYS[coordinate][piece_value]
+    if piece_color_to_move == RED_PIECE:
+        zobrist_key ^= ZOBRIST_RED_TO_MOVE_KEY
+    return zobrist_key
+
+# The incremental update functions below mirror the board update functions in the main engine
+# file. They must be called BEFORE the move is played on the board, since they read the values of
+# the squares that the move is about to change. The side to move is flipped by every move.
+
+def update_zobrist_key_for_start_and_end_coordinates(zobrist_key, start_coordinate,
+                                                     end_coordinate, board_position):
+    piece_value = get_square_value(start_coordinate, board_position) & ~ON_BACK_RANK
+    piece_going_to_back_rank = get_square_value(end_coordinate, board_position) & ON_BACK_RANK
+    if piece_going_to_back_rank:
+        end_piece_value = piece_value | IS_KING
+    else:
+        end_piece_value = piece_value
+    zobrist_key ^= ZOBRIST_PIECE_KEYS[start_coordinate][piece_value]
+    zobrist_key ^= ZOBRIST_PIECE_KEYS[end_coordinate][end_piece_value]
+    return zobrist_key
+
+def update_zobrist_key(zobrist_key, selected_move, board_position):
+    zobrist_key = update_zobrist_key_for_start_and_end_coordinates(
+        zobrist_key, selected_move & MOVE_COORDINATE_MASK,
+        selected_move >> MOVE_END_SHIFT & MOVE_COORDINATE_MASK, board_position)
+    capture_mask = selected_move >> MOVE_CAPTURE_SHIFT
+    while capture_mask:
+        capture_bit = capture_mask & -capture_mask
+        capture = capture_bit.bit_length()
+        captured_value = board_position[capture - 1] & ~ON_BACK_RANK
+        zobrist_key ^= ZOBRIST_PIECE_KEYS[capture][captured_value]
+        capture_mask ^= capture_bit
+    return zobrist_key ^ ZOBRIST_RED_TO_MOVE_KEY
+
+# TRANSPOSITION TABLE CONSTANTS:
+
+# The bound type records what kind of score was stored: an exact score, a lower bound (the search
+# failed high, so the real score is at least this much) or an upper bound (the search failed
+# low, so the real score is at most this much).
+
+EXACT_BOUND = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+DEFAULT_TRANSPOSITION_TABLE_SIZE = 1 << 18
+
+# Entry layout (entries are stored as plain tuples to keep them small):
+
+ENTRY_KEY = 0
+ENTRY_DEPTH = 1
+ENTRY_SCORE = 2
+ENTRY_BOUND = 3
+ENTRY_BEST_MOVE = 4
+
+# TRANSPOSITION TABLE:
+
+# The table has a fixed number of buckets, and each bucket holds two entries. The first slot only
+# gives up its entry to a search of the same or greater depth (so expensive results survive),
+# while the second slot always takes the newest entry that did not make it into the first slot
+# (so recent results are still available). The memory used never grows past the size it was
+# created with.
+
+class TranspositionTable:
+    def __init__(self, size=DEFAULT_TRANSPOSITION_TABLE_SIZE):
+        bucket_count = 1
+        while bucket_count < size:
+            bucket_count *= 2
+        self.index_mask = bucket_count - 1
+        self.depth_preferred_entries = [None] * bucket_count
+        self.always_replace_entries = [None] * bucket_count
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def probe(self, zobrist_key):
+        self.probes += 1
+        index = zobrist_key & self.index_mask
+        entry = self.depth_preferred_entries[index]
+        if entry is not None and entry[ENTRY_KEY] == zobrist_key:
+            self.hits += 1
+            return entry
+        entry = self.always_replace_entries[index]
+        if entry is not None and entry[ENTRY_KEY] == zobrist_key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, zobrist_key, depth, score, bound, best_move):
+        self.stores += 1
+        index = zobrist_key & self.index_mask
+        new_entry = (zobrist_key, depth, score, bound, best_move)
+        depth_preferred_entry = self.depth_preferred_entries[index]
+        if depth_preferred_entry is None or \
+           depth_preferred_entry[ENTRY_KEY] == zobrist_key or \
+           depth >= depth_preferred_entry[ENTRY_DEPTH]:
+            self.depth_preferred_entries[index] = new_entry
+        else:
+            self.always_replace_entries[index] = new_entry
+
+    def clear(self):
+        for index in range(len(self.depth_preferred_entries)):
+            self.depth_preferred_entries[index] = None
+            self.always_replace_entries[index] = None
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+# SEARCH INSTRUMENTATION
+
+# A SearchInstrumentation shows where a search spends its time. Handed to a search, it wraps the
+# move generation, board update and evaluation functions that the search calls with versions
+# that count the calls and time them, and it keeps node and branching factor statistics for
+# every iteration (search depth). The results come back as a plain dict that can be printed or
+# dumped to JSON.
+
+# Instrumentation is opt-in: a search that is not given a SearchInstrumentation calls the
+# unwrapped functions directly, so the only cost left is choosing the functions once per search.
+# A search resets the instrumentation it is given, so every report covers a single search.
+
+# Note: this file doesn't import any other engine file, so every search (including the one in the
+# main engine file) can use it without circular imports.
+
+import json
+import time
+
+# INSTRUMENTATION CATEGORIES:
+
+MOVE_GENERATION = "move_generation"
+BOARD_UPDATE = "board_update"
+EVALUATION = "evaluation"
+
+INSTRUMENTATION_CATEGORIES = (MOVE_GENERATION, BOARD_UPDATE, EVALUATION)
+
+# INSTRUMENTATION OBJECT:
+
+class SearchInstrumentation:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.call_counts = {category: 0 for category in INSTRUMENTATION_CATEGORIES}
+        self.call_times = {category: 0.0 for category in INSTRUMENTATION_CATEGORIES}
+        self.move_generator_calls = 0
+        self.generated_moves = 0
+        self.depth_statistics = []
+        self.start_time = time.perf_counter()
+        self.iteration_start = None
+
+    # Returns a version of the function that adds its call count and running time to the category.
+
+    def wrap(self, category, function):
+        call_counts = self.call_counts
+        call_times = self.call_times
+        perf_counter = time.perf_counter
+
+        def timed_function(*arguments):
+            start_time = perf_counter()
+            result = function(*arguments)
+            call_times[category] += perf_counter() - start_time
+            call_counts[category] += 1
+            return result
+
+        return timed_function
+
+    # Full move generators (the ones that list every legal move of a position) are also counted by
+    # the number of moves they return, which gives the average branching factor.
+
+    def wrap_move_generator(self, function):
+        instrumentation = self
+        call_counts = self.call_counts
+        call_times = self.call_times
+        perf_counter = time.perf_counter
+
+        def timed_move_generator(*arguments):
+            start_time = perf_counter()
+            moves = function(*arguments)
+            call_times[MOVE_GENERATION] += perf_counter() - start_time
+            call_counts[MOVE_GENERATION] += 1
+            instrumentation.move_generator_calls += 1
+            instrumentation.generated_moves += len(moves)
+            return moves
+
+        return timed_move_generator
+
+    # PER-DEPTH STATISTICS:
+
+    def start_iteration(self):
+        self.iteration_start = (time.perf_counter(), self.move_generator_calls,
+                                self.generated_moves)
+
+    # The effective branching factor is how many times more nodes this iteration needed than the
+    # one before it. The average branching factor is the number of legal moves per position that
+    # had its moves generated.
+
+    def finish_iteration(self, depth, nodes, quiescence_nodes=0):
+        start_time, start_generation_calls, start_generated_moves = self.iteration_start
+        generation_calls = self.move_generator_calls - start_generation_calls
+        generated_moves = self.generated_moves - start_generated_moves
+        effective_branching_factor = None
+        if self.depth_statistics and self.depth_statistics[-1]["nodes"] > 0:
+            effective_branching_factor = nodes / self.depth_statistics[-1]["nodes"]
+        self.depth_statistics.append({
+            "depth": depth,
+            "nodes": nodes,
+            "quiescence_nodes": quiescence_nodes,
+            "time": time.perf_counter() - start_time,
+            "effective_branching_factor": effective_branching_factor,
+            "average_branching_factor": generated_moves / generation_calls if generation_calls else None
+        })
+
+    # REPORT FUNCTIONS:
+
+    def get_report(self, search_summary=None):
+        total_time = time.perf_counter() - self.start_time
+        timings = {}
+        for category in INSTRUMENTATION_CATEGORIES:
+            call_count = self.call_counts[category]
+            call_time = self.call_times[category]
+            timings[category] = {
+                "calls": call_count,
+                "time": call_time,
+                "time_per_call": call_time / call_count if call_count else None,
+                "share_of_total_time": call_time / total_time if total_time > 0 else None
+            }
+        report = {
+            "total_time": total_time,
+            "timings": timings,
+            "generated_moves": self.generated_moves,
+            "depths": self.depth_statistics
+        }
+        if search_summary is not None:
+            report["search"] = search_summary
+        return report
+
+    def get_json_report(self, search_summary=None):
+        return json.dumps(self.get_report(search_summary), indent=2)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+# GAME SERVER LOAD TEST CLIENT
+
+# Opens many sessions against a running game server (see the server file) at once, and has each
+# of them play random legal moves against the engine for a fixed amount of time. Every MOVE is
+# timed from sending the command to reading the answer (which includes the engine's reply), and
+# the report gives the throughput in moves per second together with the median and p99 latency.
+
+# Games are restarted with NEW when they are over or after max_game_moves player moves, so
+# sessions never get stuck in an endless king shuffle.
+
+import argparse
+import asyncio
+import math
+import random
+import time
+
+from checkers_engine_server import DEFAULT_SERVER_HOST, DEFAULT_SERVER_PORT
+
+DEFAULT_SESSION_COUNT = 16
+DEFAULT_TEST_DURATION = 10.0
+DEFAULT_MAX_GAME_MOVES = 40
+
+# STATISTICS FUNCTIONS:
+
+def get_latency_percentile(sorted_latencies, percentile):
+    if not sorted_latencies:
+        return 0.0
+    rank = max(math.ceil(percentile / 100 * len(sorted_latencies)), 1)
+    return sorted_latencies[rank - 1]
+
+def create_load_test_report(move_latencies, game_count, error_count, elapsed_time):
+    sorted_latencies = sorted(move_latencies)
+    return {
+        "moves": len(sorted_latencies),
+        "games": game_count,
+        "errors": error_count,
+        "elapsed_time": elapsed_time,
+        "moves_per_second": len(sorted_latencies) / elapsed_time if elapsed_time else 0.0,
+        "p50_latency": get_latency_percentile(sorted_latencies, 50),
+        "p99_latency": get_latency_percentile(sorted_latencies, 99),
+        "max_latency": sorted_latencies[-1] if sorted_latencies else 0.0
+    }
+
+def print_load_test_report(load_test_report):
+    print(f"Moves: {load_test_report['moves']} in {load_test_report['elapsed_time']:.2f}s "
+          f"({load_test_report['moves_per_second']:.1f} moves/s)")
+    print(f"Games started: {load_test_report['games']}, errors: {load_test_report['errors']}")
+    print(f"Move latency: p50 {load_test_report['p50_latency'] * 1000:.1f} ms, "
+          f"p99 {load_test_report['p99_latency'] * 1000:.1f} ms, "
+          f"max {load_test_report['max_latency'] * 1000:.1f} ms")
+
+# SESSION FUNCTIONS:
+
+async def send_command(reader, writer, command_line):
+    writer.write(command_line.encode("ascii") + b"\n")
+    await writer.drain()
+    answer = await reader.readline()
+    if not answer:
+        raise ConnectionError("the server closed the connection")
+    return answer.decode("ascii").strip()
+
+# Plays games until the deadline (a time.monotonic() value), adding a latency for every move to
+# move_latencies, and returns (games started, errors).
+
+async def run_load_test_session(open_connection, deadline, max_game_moves, move_latencies,
+                                session_random):
+    reader, writer = await open_connection()
+    game_count = 0
+    error_count = 0
+    try:
+        while time.monotonic() < deadline:
+            player_color = session_random.choice(("black", "red"))
+            answer = await send_command(reader, writer, f"NEW {player_color}")
+            game_count += 1
+            for game_move_number in range(max_game_moves):
+                if answer.startswith("ERROR") or answer.split()[3] != "*" or \
+                   time.monotonic() >= deadline:
+                    break
+                moves = (await send_command(reader, writer, "MOVES")).split()[1:]
+                move_start_time = time.monotonic()
+                answer = await send_command(reader, writer, f"MOVE {session_random.choice(moves)}")
+                move_latencies.append(time.monotonic() - move_start_time)
+            if answer.startswith("ERROR"):
+                error_count += 1
+        await send_command(reader, writer, "QUIT")
+    finally:
+        writer.close()
+    return (game_count, error_count)
+
+async def run_load_test(host=DEFAULT_SERVER_HOST, port=DEFAULT_SERVER_PORT, unix_socket_path=None,
+                        session_count=DEFAULT_SESSION_COUNT, test_duration=DEFAULT_TEST_DURATION,
+                        max_game_moves=DEFAULT_MAX_GAME_MOVES, seed=None):
+    if unix_socket_path is not None:
+        open_connection = lambda: asyncio.open_unix_connection(unix_socket_path)
+    else:
+        open_connection = lambda: asyncio.open_connection(host, port)
+    master_random = random.Random(seed)
+    move_latencies = []
+    start_time = time.monotonic()
+    deadline = start_time + test_duration
+    session_results = await asyncio.gather(*(
+        run_load_test_session(open_connection, deadline, max_game_moves, move_latencies,
+                              random.Random(master_random.getrandbits(64)))
+        for session_number in range(session_count)))
+    elapsed_time = time.monotonic() - start_time
+    return create_load_test_report(move_latencies,
+                                   sum(game_count for game_count, error_count in session_results),
+                                   sum(error_count for game_count, error_count in session_results),
+                                   elapsed_time)
+
+# Example: checkers_engine_load_test.py --sessions 32 --duration 30
+# (start the server first, such as checkers_engine_server.py --time-limit 0.1)
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="Load test a running game server.")
+    argument_parser.add_argument("--host", default=DEFAULT_SERVER_HOST)
+    argument_parser.add_argument("--port", type=int, default=DEFAULT_SERVER_PORT)
+    argument_parser.add_argument("--unix", default=None, help="connect to this Unix socket path")
+    argument_parser.add_argument("--sessions", type=int, default=DEFAULT_SESSION_COUNT)
+    argument_parser.add_argument("--duration", type=float, default=DEFAULT_TEST_DURATION,
+                                 help="seconds to keep playing")
+    argument_parser.add_argument("--max-game-moves", type=int, default=DEFAULT_MAX_GAME_MOVES)
+    argument_parser.add_argument("--seed", type=int, default=None)
+    arguments = argument_parser.parse_args()
+    print_load_test_report(asyncio.run(run_load_test(arguments.host, arguments.port,
+                                                     arguments.unix, arguments.sessions,
+                                                     arguments.duration,
+                                                     arguments.max_game_moves, arguments.seed)))
@@ -4,8 +4,9 @@
 # U = up, D = down, L = left, R = right (when used as prefixes for search functions & variables)
 
 import math
-import copy
-import re
+import os
+
+from checkers_engine_instrumentation import BOARD_UPDATE, EVALUATION
 
 # PIECE VALUE CONSTANTS:
 
@@ -54,6 +55,18 @@ def generate_empty_board():
         board_position.append(ON_BACK_RANK + EMPTY_SQUARE)
     return board_position
 
+def generate_position_from_coordinates(black_pawns, black_kings, red_pawns, red_kings):
+    board_position = generate_empty_board()
+    for coordinate in black_pawns:
+        board_position[coordinate - 1] |= BLACK_PIECE
+    for coordinate in black_kings:
+        board_position[coordinate - 1] |= BLACK_KING
+    for coordinate in red_pawns:
+        board_position[coordinate - 1] |= RED_PIECE
+    for coordinate in red_kings:
+        board_position[coordinate - 1] |= RED_KING
+    return board_position
+
 # BOARD OBJECT LOCATION FUNCTIONS:
 
 def get_square_value(coordinate, board_position):
@@ -149,11 +162,44 @@ def UR_search(coordinate):
         new_coordinate = None
     return new_coordinate
 
+# NEIGHBOR AND JUMP LANDING TABLES:
+
+# The search functions above are only run once per coordinate when this file is loaded. Their
+# results are stored in tables indexed by coordinate (index 0 is unused so that the coordinate
+# can be used directly), which turns every neighbor lookup during move generation into a
+# single tuple access.
+
+def build_neighbor_table(searcher):
+    neighbor_table = [None]
+    for coordinate in range(1, 33):
+        neighbor_table.append(searcher(coordinate))
+    return tuple(neighbor_table)
+
+def build_jump_landing_table(searcher):
+    jump_landing_table = [None]
+    for coordinate in range(1, 33):
+        neighbor_coordinate = searcher(coordinate)
+        if neighbor_coordinate is not None:
+            jump_landing_table.append(searcher(neighbor_coordinate))
+        else:
+            jump_landing_table.append(None)
+    return tuple(jump_landing_table)
+
+DL_NEIGHBORS = build_neighbor_table(DL_search)
+DR_NEIGHBORS = build_neighbor_table(DR_search)
+UL_NEIGHBORS = build_neighbor_table(UL_search)
+UR_NEIGHBORS = build_neighbor_table(UR_search)
+
+DL_JUMP_LANDINGS = build_jump_landing_table(DL_search)
+DR_JUMP_LANDINGS = build_jump_landing_table(DR_search)
+UL_JUMP_LANDINGS = build_jump_landing_table(UL_search)
+UR_JUMP_LANDINGS = build_jump_landing_table(UR_search)
+
 # SEARCH CONSTANTS:
 
 SEARCHERS = {
-    "down": (DL_search, DR_search),
-    "up": (UL_search, UR_search)
+    "down": (DL_NEIGHBORS, DR_NEIGHBORS),
+    "up": (UL_NEIGHBORS, UR_NEIGHBORS)
 }
 
 LEFT = 0
@@ -164,17 +210,17 @@ RIGHT = 1
 # In checkers, a "simple" move occurs when a piece moves from its current position
 # to an immediately adjacent empty square without capturing anything.
 # Example notation: "1-5" would mean a piece on square 1 moved to the empty square 5.
+# (Simple moves are generated as encoded moves, see the move encoding section below.)
 
 def simple_search(coordinate, board_position, vertical_search_direction):
     simples = []
-    L_coordinate = SEARCHERS[vertical_search_direction][LEFT](coordinate)
-    R_coordinate = SEARCHERS[vertical_search_direction][RIGHT](coordinate)
+    L_coordinate = SEARCHERS[vertical_search_direction][LEFT][coordinate]
+    R_coordinate = SEARCHERS[vertical_search_direction][RIGHT][coordinate]
     destination_coordinates = [L_coordinate, R_coordinate]
-    occupied_squares = locate_general_board_objects(board_position, IS_OCCUPIED)
     for destination_coordinate in destination_coordinates:
-        if destination_coordinate not in occupied_squares and destination_coordinate is not None:
-            simple = str(coordinate) + '-' + str(destination_coordinate)
-            simples.append(simple)
+        if destination_coordinate is not None and \
+           not board_position[destination_coordinate - 1] & IS_OCCUPIED:
+            simples.append(encode_move(coordinate, destination_coordinate))
     return simples
 
 def find_pawn_simples(board_position, piece_color, search_direction):
@@ -201,191 +247,107 @@ def find_all_simples(board_position, piece_color, search_direction):
     simples.extend(pawn_simples + king_simples)
     return simples
 
-# BASIC JUMP SEARCH FUNCTION:
-
-def jump_search(jumper_coordinate, board_position, jumper_color,
-                vertical_search_direction, horizontal_search_direction):
-    occupied_squares = locate_general_board_objects(board_position, IS_OCCUPIED)
-    jumpee_coordinate = \
-        SEARCHERS[vertical_search_direction][horizontal_search_direction](jumper_coordinate)
-    if jumpee_coordinate is not None and jumpee_coordinate in occupied_squares:
-        jumpee_value = get_square_value(jumpee_coordinate, board_position)
-        jumpee_color = jumpee_value & IS_OCCUPIED
-        if jumper_color != jumpee_color:
-            destination_coordinate = \
-                SEARCHERS[vertical_search_direction][horizontal_search_direction](jumpee_coordinate)
-            jump_info = (jumpee_coordinate, destination_coordinate)
-            return jump_info
-
-JUMPEE = 0
-DESTINATION = 1
-
-# JUMP MOVE INITIALIZATION FUNCTIONS:
-        
-class Path:
-    def __init__(self, start_coordinate, end_coordinate):
-        self.start_coordinate = start_coordinate
-        self.end_coordinate = end_coordinate
-        self.captures = []
-
-    def record_capture(self, jumpee_coordinate):
-        if jumpee_coordinate not in self.captures:
-            self.captures.append(jumpee_coordinate)
-    
-    def __str__(self):
-        return f"{self.start_coordinate}x{self.end_coordinate} {self.captures}"
-
-def create_initial_path(jumper_coordinate, jump_info, occupied_squares):
-    jumpee_coordinate = jump_info[JUMPEE]
-    destination_coordinate = jump_info[DESTINATION]
-    if destination_coordinate is not None and destination_coordinate not in occupied_squares:
-        initial_path = Path(jumper_coordinate, destination_coordinate)
-        initial_path.record_capture(jumpee_coordinate)
-        return initial_path
-
-def process_jump_info(jumper_coordinate, jump_info, board_position):
-    occupied_squares = locate_general_board_objects(board_position, IS_OCCUPIED)
-    if jump_info is not None:
-        destination_coordinate = jump_info[DESTINATION]
-        if destination_coordinate is not None and destination_coordinate not in occupied_squares:
-            initial_path = create_initial_path(jumper_coordinate, jump_info, occupied_squares)
-            return initial_path
-
-def create_initial_pawn_paths(jumper_coordinate, board_position, piece_color,
-                              vertical_search_direction):
-    initial_pawn_paths = []
-    L_jump_info = jump_search(jumper_coordinate, board_position, piece_color,
-                              vertical_search_direction, LEFT)
-    R_jump_info = jump_search(jumper_coordinate, board_position, piece_color,
-                              vertical_search_direction, RIGHT)
-    jump_info_for_initial_pawn_paths = [L_jump_info, R_jump_info]
-    for jump_info in jump_info_for_initial_pawn_paths:
-        initial_path = process_jump_info(jumper_coordinate, jump_info, board_position)
-        if initial_path is not None: initial_pawn_paths.append(initial_path)
-    return initial_pawn_paths
-
-def create_initial_king_paths(jumper_coordinate, board_position, piece_color):
-    initial_king_paths = []
-    DL_jump_info = jump_search(jumper_coordinate, board_position, piece_color, "down", LEFT)
-    DR_jump_info = jump_search(jumper_coordinate, board_position, piece_color, "down", RIGHT)
-    UL_jump_info = jump_search(jumper_coordinate, board_position, piece_color, "up", LEFT)
-    UR_jump_info = jump_search(jumper_coordinate, board_position, piece_color, "up", RIGHT)
-    jump_info_for_initial_king_paths = [DL_jump_info, DR_jump_info, UL_jump_info, UR_jump_info]
-    for jump_info in jump_info_for_initial_king_paths:
-        initial_path = process_jump_info(jumper_coordinate, jump_info, board_position)
-        if initial_path is not None: initial_king_paths.append(initial_path)
-    return initial_king_paths
+# JUMP SEARCH CONSTANTS:
+
+# Each jump direction pairs the table of neighboring squares (where the jumped piece would be)
+# with the table of jump landing squares.
+
+JUMP_DIRECTIONS = {
+    "down": ((DL_NEIGHBORS, DL_JUMP_LANDINGS), (DR_NEIGHBORS, DR_JUMP_LANDINGS)),
+    "up": ((UL_NEIGHBORS, UL_JUMP_LANDINGS), (UR_NEIGHBORS, UR_JUMP_LANDINGS))
+}
+
+KING_JUMP_DIRECTIONS = JUMP_DIRECTIONS["down"] + JUMP_DIRECTIONS["up"]
+
+NEIGHBOR_TABLE = 0
+JUMP_LANDING_TABLE = 1
+
+# MOVE ENCODING:
+
+# Every move is packed into a single int: the start coordinate in the lowest 6 bits, the end
+# coordinate in the next 6 bits and a capture mask above those (bit n - 1 of the mask is set when
+# the piece on coordinate n is captured). A simple move is a move with an empty capture mask.
+# Moves are only turned into text ("9-13" or "13x22 [17]") when they are shown to the user.
+
+MOVE_COORDINATE_MASK = 0x3F
+MOVE_END_SHIFT = 6
+MOVE_CAPTURE_SHIFT = 12
+
+def encode_move(start_coordinate, end_coordinate, capture_mask=0):
+    return start_coordinate | end_coordinate << MOVE_END_SHIFT | capture_mask << MOVE_CAPTURE_SHIFT
+
+def get_move_start_coordinate(move):
+    return move & MOVE_COORDINATE_MASK
+
+def get_move_end_coordinate(move):
+    return move >> MOVE_END_SHIFT & MOVE_COORDINATE_MASK
+
+def get_move_capture_mask(move):
+    return move >> MOVE_CAPTURE_SHIFT
+
+def is_jump_move(move):
+    return move >> MOVE_CAPTURE_SHIFT != 0
+
+def get_move_captures(move):
+    capture_mask = move >> MOVE_CAPTURE_SHIFT
+    return [coordinate for coordinate in range(1, 33) if capture_mask >> (coordinate - 1) & 1]
+
+def format_move(move):
+    start_coordinate = get_move_start_coordinate(move)
+    end_coordinate = get_move_end_coordinate(move)
+    if is_jump_move(move):
+        return f"{start_coordinate}x{end_coordinate} {get_move_captures(move)}"
+    return f"{start_coordinate}-{end_coordinate}"
 
 # JUMP MOVE CALCULATION FUNCTIONS:
 
-def create_pawn_path_jump_branch_info(current_path, board_position, piece_color,
-                                      vertical_search_direction):
-    if current_path is not None:
-        L_jump_branch_info = jump_search(current_path.end_coordinate,
-                                         board_position, piece_color,
-                                         vertical_search_direction, LEFT)
-        R_jump_branch_info = jump_search(current_path.end_coordinate,
-                                         board_position, piece_color,
-                                         vertical_search_direction, RIGHT)
-        jump_branch_info = (L_jump_branch_info, R_jump_branch_info)
-        return jump_branch_info
-
-def create_king_path_jump_branch_info(current_path, board_position, piece_color):
-    if current_path is not None:
-        DL_jump_branch_info = jump_search(current_path.end_coordinate,
-                                          board_position, piece_color,
-                                          "down", LEFT)
-        DR_jump_branch_info = jump_search(current_path.end_coordinate,
-                                          board_position, piece_color,
-                                          "down", RIGHT)
-        UL_jump_branch_info = jump_search(current_path.end_coordinate,
-                                          board_position, piece_color,
-                                          "up", LEFT)
-        UR_jump_branch_info = jump_search(current_path.end_coordinate,
-                                          board_position, piece_color,
-                                          "up", RIGHT)
-        jump_branch_info = (DL_jump_branch_info, DR_jump_branch_info,
-                            UL_jump_branch_info, UR_jump_branch_info)
-        return jump_branch_info
-
-def update_current_pawn_path(current_path, jump_branch_info, occupied_squares):
-    new_paths = []
-    L_path_jump_info = jump_branch_info[0]
-    R_path_jump_info = jump_branch_info[1]
-    potential_branches = [L_path_jump_info, R_path_jump_info]
-    for jump_branch in potential_branches:
-        if jump_branch is not None:
-            jumpee_coordinate = jump_branch[JUMPEE]
-            destination_coordinate = jump_branch[DESTINATION]
-            if destination_coordinate is not None:
-                if destination_coordinate not in occupied_squares:
-                    new_path = copy.deepcopy(current_path)
-                    new_path.record_capture(jumpee_coordinate)
-                    new_path.end_coordinate = destination_coordinate
-                    new_paths.append(new_path)
-    return new_paths
-
-def update_current_king_path(current_path, jump_branch_info, occupied_squares):
-    new_paths = []
-    DL_path_jump_info = jump_branch_info[0]
-    DR_path_jump_info = jump_branch_info[1]
-    UL_path_jump_info = jump_branch_info[2]
-    UR_path_jump_info = jump_branch_info[3]
-    potential_branches = [DL_path_jump_info, DR_path_jump_info,
-                          UL_path_jump_info, UR_path_jump_info]
-    previous_captures = current_path.captures
-    for jump_branch in potential_branches:
-        if jump_branch is not None:
-            jumpee_coordinate = jump_branch[JUMPEE]
-            destination_coordinate = jump_branch[DESTINATION]
-            if destination_coordinate is not None and \
-               jumpee_coordinate not in previous_captures:
-                if destination_coordinate not in occupied_squares or \
-                   destination_coordinate == current_path.start_coordinate:
-                    new_path = copy.deepcopy(current_path)
-                    new_path.record_capture(jumpee_coordinate)
-                    new_path.end_coordinate = destination_coordinate
-                    new_paths.append(new_path)
-    return new_paths
+# Jump paths are found with a depth-first walk from the jumping piece. The captures made so far
+# are carried along as a capture mask, which is also the capture mask of the finished move, so a
+# move is only encoded once a chain cannot be extended any further.
+
+# Note: captured pieces stay on the board until the move is played, so they can't be jumped a
+# second time and nothing can land on them. The jumping piece itself has left its start square,
+# which is why a king is allowed to land back on its own start coordinate.
+
+def extend_jump_path(start_coordinate, current_coordinate, capture_mask,
+                     board_position, piece_color, jump_directions, finished_paths):
+    path_extended = False
+    for jump_direction in jump_directions:
+        destination_coordinate = jump_direction[JUMP_LANDING_TABLE][current_coordinate]
+        if destination_coordinate is None:
+            continue
+        jumpee_coordinate = jump_direction[NEIGHBOR_TABLE][current_coordinate]
+        jumpee_value = board_position[jumpee_coordinate - 1]
+        if not jumpee_value & IS_OCCUPIED or jumpee_value & piece_color:
+            continue
+        jumpee_bit = 1 << (jumpee_coordinate - 1)
+        if capture_mask & jumpee_bit:
+            continue
+        if board_position[destination_coordinate - 1] & IS_OCCUPIED and \
+           destination_coordinate != start_coordinate:
+            continue
+        path_extended = True
+        extend_jump_path(start_coordinate, destination_coordinate, capture_mask | jumpee_bit,
+                         board_position, piece_color, jump_directions, finished_paths)
+    if not path_extended and capture_mask:
+        finished_paths.append(encode_move(start_coordinate, current_coordinate, capture_mask))
 
 def calculate_pawn_paths(jumper_coordinate, board_position, piece_color,
                          vertical_search_direction):
-    occupied_squares = locate_general_board_objects(board_position, IS_OCCUPIED)
-    processing = create_initial_pawn_paths(jumper_coordinate, board_position, piece_color,
-                                           vertical_search_direction)
-    finished_paths = []
-    while len(processing) > 0:
-        for current_path in processing:
-            jump_branch_info = create_pawn_path_jump_branch_info(current_path,
-                                                                 board_position, piece_color,
-                                                                 vertical_search_direction)
-            paths_to_process = update_current_pawn_path(current_path, jump_branch_info,
-                                                        occupied_squares)
-            if len(paths_to_process) == 0:
-                finished_paths.append(current_path)
-            else:
-                processing.extend(paths_to_process)
-            processing.remove(current_path)
-    finished_pawn_paths = finished_paths
+    finished_pawn_paths = []
+    extend_jump_path(jumper_coordinate, jumper_coordinate, 0, board_position, piece_color,
+                     JUMP_DIRECTIONS[vertical_search_direction], finished_pawn_paths)
     return finished_pawn_paths
 
+# Note: a king can capture the same pieces in a different order and still finish on the same
+# coordinate (such as a loop that ends back on its start coordinate). Those routes encode to the
+# same move, so each move is only kept once (in the order it was first found).
+
 def calculate_king_paths(jumper_coordinate, board_position, piece_color):
-    occupied_squares = locate_general_board_objects(board_position, IS_OCCUPIED)
-    processing = create_initial_king_paths(jumper_coordinate, board_position, piece_color)
-    finished_paths = []
-    while len(processing) > 0:
-        for current_path in processing:
-            jump_branch_info = create_king_path_jump_branch_info(current_path,
-                                                                 board_position, piece_color)
-            paths_to_process = update_current_king_path(current_path, jump_branch_info,
-                                                        occupied_squares)
-            if len(paths_to_process) == 0:
-                finished_paths.append(current_path)
-            else:
-                processing.extend(paths_to_process)
-            processing.remove(current_path)
-    finished_king_paths = finished_paths
-    return finished_king_paths
+    finished_king_paths = []
+    extend_jump_path(jumper_coordinate, jumper_coordinate, 0, board_position, piece_color,
+                     KING_JUMP_DIRECTIONS, finished_king_paths)
+    return list(dict.fromkeys(finished_king_paths))
 
 # JUMP MOVE LIST FUNCTIONS:
 
@@ -421,13 +383,56 @@ def list_all_jump_moves(board_position, piece_color, vertical_search_direction):
 def list_all_possible_moves(board_position, piece_color, vertical_search_direction):
     all_possible_moves = []
     jump_moves = list_all_jump_moves(board_position, piece_color, vertical_search_direction)
-    simples = find_all_simples(board_position, piece_color, vertical_search_direction)
     if len(jump_moves) > 0:
         all_possible_moves.extend(jump_moves)
     else:
+        simples = find_all_simples(board_position, piece_color, vertical_search_direction)
         all_possible_moves.extend(simples)
     return all_possible_moves
 
+# LAZY MOVE GENERATORS:
+
+# These yield the same moves in the same order as the list functions above, but one at a time, so
+# a caller that only needs the first few moves (or just needs to know whether there are any) can
+# stop early without the rest being calculated. Jumps are yielded first, and since captures are
+# compulsory the simple moves are never looked for once a jump has been found.
+
+# Note: the board must not be changed while one of these generators is still being iterated over.
+
+def generate_jump_moves(board_position, piece_color, vertical_search_direction):
+    for pawn in locate_specific_board_objects(board_position, piece_color):
+        yield from calculate_pawn_paths(pawn, board_position, piece_color,
+                                        vertical_search_direction)
+    for king in locate_specific_board_objects(board_position, piece_color + IS_KING):
+        yield from calculate_king_paths(king, board_position, piece_color)
+
+def generate_simple_moves(board_position, piece_color, vertical_search_direction):
+    for pawn in locate_specific_board_objects(board_position, piece_color):
+        yield from simple_search(pawn, board_position, vertical_search_direction)
+    for king in locate_specific_board_objects(board_position, piece_color + IS_KING):
+        yield from simple_search(king, board_position, "down")
+        yield from simple_search(king, board_position, "up")
+
+def generate_possible_moves(board_position, piece_color, vertical_search_direction):
+    jump_found = False
+    for jump_move in generate_jump_moves(board_position, piece_color, vertical_search_direction):
+        jump_found = True
+        yield jump_move
+    if not jump_found:
+        yield from generate_simple_moves(board_position, piece_color, vertical_search_direction)
+
+# Note: any simple move proves that the side has a legal move (even if a jump would have to be
+# played instead), and simple moves are much cheaper to find than jumps, so they are looked for
+# first.
+
+def has_legal_move(board_position, piece_color, vertical_search_direction):
+    for simple_move in generate_simple_moves(board_position, piece_color,
+                                             vertical_search_direction):
+        return True
+    for jump_move in generate_jump_moves(board_position, piece_color, vertical_search_direction):
+        return True
+    return False
+
 # USER INTERFACE CODE:
 
 # " " = empty square (0 & 8)
@@ -481,27 +486,52 @@ def print_current_position(board_position):
     for row in rows:
         print("\033[0;44m" + row + "\033[0m")
 
+# TURN MOVE CACHE:
+
+# Every game session keeps one TurnMoveCache. It holds the legal moves of the position that is
+# currently on the board, so the game over check, the move menu, the opening book and the engine
+# all share a single move generation per turn. The cached position is replaced as soon as moves
+# are asked for in a different position (or for the other side). The moves are stored as a tuple
+# so that no caller can change them for the others.
+
+class TurnMoveCache:
+    def __init__(self):
+        self.position_key = None
+        self.legal_moves = ()
+        self.generation_count = 0
+
+    def get_legal_moves(self, board_position, piece_color):
+        position_key = (tuple(board_position), piece_color)
+        if position_key != self.position_key:
+            self.legal_moves = tuple(list_all_possible_moves(board_position, piece_color,
+                                                             VERTICAL_SEARCH_DIRECTIONS[piece_color]))
+            self.position_key = position_key
+            self.generation_count += 1
+        return self.legal_moves
+
+    def has_legal_move(self, board_position, piece_color):
+        return len(self.get_legal_moves(board_position, piece_color)) > 0
+
 # MOVE SELECTION FUNCTIONS:
 
-def select_move_color(board_position, piece_color):
+def select_move_color(board_position, piece_color, turn_move_cache):
+    moves = turn_move_cache.get_legal_moves(board_position, piece_color)
     if piece_color is BLACK_PIECE:
-        moves = list_all_possible_moves(board_position, piece_color, "down")
         print("\nMoves for \033[30;107mblack\033[0m:\n")
     elif piece_color is RED_PIECE:
-        moves = list_all_possible_moves(board_position, piece_color, "up")
         print("\nMoves for \033[31;107mred\033[0m:\n")
     return moves
 
 def list_countable_moves(moves):
     count = 1
     for move in moves:
-        move_string = f"{count}: {move}"
+        move_string = f"{count}: {format_move(move)}"
         print(move_string)
         count += 1
     return count
 
-def select_move(board_position, piece_color):
-    moves = select_move_color(board_position, piece_color)
+def select_move(board_position, piece_color, turn_move_cache):
+    moves = select_move_color(board_position, piece_color, turn_move_cache)
     count = list_countable_moves(moves)
     while True:
         move_selection_number_string = \
@@ -524,53 +554,54 @@ def select_move(board_position, piece_color):
 
 # BOARD UPDATE FUNCTIONS:
 
+# Note: a king can finish a jump on a back rank square after starting on one (or even land back
+# on its own start coordinate), so the back rank bit is stripped from the moving piece before
+# the destination value is built.
+
 def update_start_and_end_coordinate_values(start_coordinate, end_coordinate, board_position):
     piece_value = get_square_value(start_coordinate, board_position)
     destination_value = get_square_value(end_coordinate, board_position)
     piece_on_back_rank = piece_value & ON_BACK_RANK
     piece_going_to_back_rank = destination_value & ON_BACK_RANK
-    piece_is_king = piece_value & IS_KING
+    piece_value_without_back_rank_info = piece_value & ~ON_BACK_RANK
     if piece_on_back_rank:
         board_position[start_coordinate - 1] = ON_BACK_RANK
     else:
         board_position[start_coordinate - 1] = EMPTY_SQUARE
     if piece_going_to_back_rank:
-        if piece_is_king:
-            board_position[end_coordinate - 1] = piece_value + ON_BACK_RANK
-        else:
-            board_position[end_coordinate - 1] = piece_value + IS_KING + ON_BACK_RANK
+        board_position[end_coordinate - 1] = piece_value_without_back_rank_info | IS_KING | ON_BACK_RANK
     else:
-        if piece_on_back_rank:
-            board_position[end_coordinate - 1] = piece_value - ON_BACK_RANK
-        else:
-            board_position[end_coordinate - 1] = piece_value
-
-def update_board_for_simple_move(selected_move, board_position):
-    move_coordinates = re.split("[-]", selected_move)
-    start_coordinate = int(move_coordinates[0])
-    end_coordinate = int(move_coordinates[1])
-    update_start_and_end_coordinate_values(start_coordinate, end_coordinate, board_position)
+        board_position[end_coordinate - 1] = piece_value_without_back_rank_info
 
-def update_board_for_jump_move(selected_move, board_position):
-    start_coordinate = selected_move.start_coordinate
-    end_coordinate = selected_move.end_coordinate
-    captures = selected_move.captures
-    update_start_and_end_coordinate_values(start_coordinate, end_coordinate, board_position)
-    for capture in captures: board_position[capture - 1] = EMPTY_SQUARE
+def remove_captured_pieces(capture_mask, board_position):
+    while capture_mask:
+        capture_bit = capture_mask & -capture_mask
+        board_position[capture_bit.bit_length() - 1] = EMPTY_SQUARE
+        capture_mask ^= capture_bit
 
 # PLAYABILITY FUNCTIONS:
 
 def play_selected_move(selected_move, board_position):
-    if type(selected_move) is str:
-        update_board_for_simple_move(selected_move, board_position)
-        print(f"\nYou have played the simple move {selected_move}\n")
-    elif type(selected_move) is Path:
-        update_board_for_jump_move(selected_move, board_position)
-        print(f"\nYou have played the jump move {selected_move}\n")
-
-def play_turn(board_position, piece_color):
-    move = select_move(board_position, piece_color)
+    update_board_position(selected_move, board_position)
+    if is_jump_move(selected_move):
+        print(f"\nYou have played the jump move {format_move(selected_move)}\n")
+    else:
+        print(f"\nYou have played the simple move {format_move(selected_move)}\n")
+
+def play_turn(board_position, piece_color, turn_move_cache):
+    move = select_move(board_position, piece_color, turn_move_cache)
     play_selected_move(move, board_position)
+    return move
+
+# Appends a finished game to a PDN file (see the PDN file), so games played here aren't lost once
+# they have been printed. losing_piece_color is the side that had no legal move left.
+
+def save_game_record(game_record_path, game_moves, losing_piece_color):
+    from checkers_engine_pdn import append_pdn_game
+    from checkers_engine_opening_book import BLACK_WIN, RED_WIN
+    game_result = RED_WIN if losing_piece_color == BLACK_PIECE else BLACK_WIN
+    append_pdn_game(game_record_path, game_moves, game_result)
+    print(f"Game saved to {game_record_path}\n")
 
 def generate_custom_position():
     custom_board_position = generate_empty_board()
@@ -587,21 +618,23 @@ TURN_TRACKER = {
 
 # 0 = red's turn, 1 = black's turn
 
-def initiate_two_player_checkers_game():
+def initiate_two_player_checkers_game(game_record_path=None):
     board_position = generate_starting_position()
     # board_position = generate_custom_position()
+    turn_move_cache = TurnMoveCache()
+    game_moves = []
     whose_turn = 1
     while True:
-        any_legal_moves = list_all_possible_moves(board_position,
-                                                  TURN_TRACKER[whose_turn][0],
-                                                  TURN_TRACKER[whose_turn][1])
-        if any_legal_moves:
+        if turn_move_cache.has_legal_move(board_position, TURN_TRACKER[whose_turn][0]):
             print(f"Turn: \033{TURN_TRACKER[whose_turn][2]}{TURN_TRACKER[whose_turn][3]}\033[0m\n")
             print_current_position(board_position)
-            play_turn(board_position, TURN_TRACKER[whose_turn][0])
+            game_moves.append(play_turn(board_position, TURN_TRACKER[whose_turn][0],
+                                        turn_move_cache))
         else:
             print_current_position(board_position)
             print(f"\nGame over. \033{TURN_TRACKER[whose_turn][4]}{TURN_TRACKER[whose_turn][5]}\033[0m\n")
+            if game_record_path is not None:
+                save_game_record(game_record_path, game_moves, TURN_TRACKER[whose_turn][0])
             break
         whose_turn = (whose_turn + 1) % 2
 
@@ -635,13 +668,76 @@ def evaluate_material_balance(board_position, F_piece_color, E_piece_color):
  # # # # # # # # MOVE SEARCH FUNCTIONS # # # # # # # #  
 # # # # # # # # # # # # # # # # # # # # # # # # # # # # 
 
-def update_board_position(selected_move, board_position):
-    if type(selected_move) is str:
-        update_board_for_simple_move(selected_move, board_position)
-    elif type(selected_move) is Path:
-        update_board_for_jump_move(selected_move, board_position)
+VERTICAL_SEARCH_DIRECTIONS = {
+    BLACK_PIECE: "down",
+    RED_PIECE: "up"
+}
+
+OPPOSING_PIECE_COLORS = {
+    BLACK_PIECE: RED_PIECE,
+    RED_PIECE: BLACK_PIECE
+}
 
-def minmax_best_move_search(principal_board, F_piece_color, E_piece_color):
+def update_board_position(selected_move, board_position):
+    update_start_and_end_coordinate_values(selected_move & MOVE_COORDINATE_MASK,
+                                           selected_move >> MOVE_END_SHIFT & MOVE_COORDINATE_MASK,
+                                           board_position)
+    remove_captured_pieces(selected_move >> MOVE_CAPTURE_SHIFT, board_position)
+
+# MAKE AND UNMAKE FUNCTIONS:
+
+# apply_move plays a move just like update_board_position, but it first records the values of the
+# squares that the move is going to change. Handing that undo record to undo_move puts the board
+# back exactly the way it was, so a search can walk the whole move tree on a single board instead
+# of copying the board for every branch.
+
+# Undo record layout: (start coordinate, start value, end coordinate, end value,
+#                      ((captured coordinate, captured value), ...))
+
+def apply_move(selected_move, board_position):
+    start_coordinate = selected_move & MOVE_COORDINATE_MASK
+    end_coordinate = selected_move >> MOVE_END_SHIFT & MOVE_COORDINATE_MASK
+    capture_mask = selected_move >> MOVE_CAPTURE_SHIFT
+    captured_square_values = []
+    while capture_mask:
+        capture_bit = capture_mask & -capture_mask
+        capture = capture_bit.bit_length()
+        captured_square_values.append((capture, board_position[capture - 1]))
+        board_position[capture - 1] = EMPTY_SQUARE
+        capture_mask ^= capture_bit
+    undo_record = (start_coordinate, board_position[start_coordinate - 1],
+                   end_coordinate, board_position[end_coordinate - 1],
+                   tuple(captured_square_values))
+    update_start_and_end_coordinate_values(start_coordinate, end_coordinate, board_position)
+    return undo_record
+
+# Note: the end square is restored before the start square, since they are the same square when a
+# king's jump loops back to where it started.
+
+def undo_move(undo_record, board_position):
+    start_coordinate, start_value, end_coordinate, end_value, captured_square_values = undo_record
+    board_position[end_coordinate - 1] = end_value
+    board_position[start_coordinate - 1] = start_value
+    for capture, captured_value in captured_square_values:
+        board_position[capture - 1] = captured_value
+
+# Note: passing a SearchInstrumentation times the move generation, board updates and evaluations
+# of the search and records its node count (the report is read from the instrumentation object,
+# so the (best_move, best_eval) return value stays the same).
+
+def minmax_best_move_search(principal_board, F_piece_color, E_piece_color, instrumentation=None):
+    generate_moves = list_all_possible_moves
+    play_move = apply_move
+    take_back_move = undo_move
+    evaluate = evaluate_material_balance
+    if instrumentation is not None:
+        instrumentation.reset()
+        generate_moves = instrumentation.wrap_move_generator(list_all_possible_moves)
+        play_move = instrumentation.wrap(BOARD_UPDATE, apply_move)
+        take_back_move = instrumentation.wrap(BOARD_UPDATE, undo_move)
+        evaluate = instrumentation.wrap(EVALUATION, evaluate_material_balance)
+        instrumentation.start_iteration()
+    nodes = 1
     if F_piece_color is BLACK_PIECE:
         F_vertical_search_direction = "down"
         E_vertical_search_direction = "up"
@@ -651,18 +747,19 @@ def minmax_best_move_search(principal_board, F_piece_color, E_piece_color):
     best_move = None
     branch_evals = []
     best_eval = -1000
-    F_legal_moves = list_all_possible_moves(principal_board, F_piece_color, F_vertical_search_direction)
+    F_legal_moves = generate_moves(principal_board, F_piece_color, F_vertical_search_direction)
     for F_move in F_legal_moves:
         leaf_evals = []
-        branch_board = principal_board.copy()
-        update_board_position(F_move, branch_board)
-        E_legal_moves = list_all_possible_moves(branch_board, E_piece_color, E_vertical_search_direction)
+        F_undo_record = play_move(F_move, principal_board)
+        E_legal_moves = generate_moves(principal_board, E_piece_color, E_vertical_search_direction)
+        nodes += 1 + len(E_legal_moves)
         for E_move in E_legal_moves:
-            leaf_board = branch_board.copy()
-            update_board_position(E_move, leaf_board)
-            resulting_material_balance = evaluate_material_balance(leaf_board, F_piece_color, E_piece_color)
+            E_undo_record = play_move(E_move, principal_board)
+            resulting_material_balance = evaluate(principal_board, F_piece_color, E_piece_color)
+            take_back_move(E_undo_record, principal_board)
             leaf_eval = resulting_material_balance
             leaf_evals.append(leaf_eval)
+        take_back_move(F_undo_record, principal_board)
         worst_eval = 1000
         for eval in leaf_evals:
             if eval < worst_eval:
@@ -677,40 +774,92 @@ def minmax_best_move_search(principal_board, F_piece_color, E_piece_color):
         if eval[1] > best_eval:
             best_eval = eval[1]
             best_move = eval[0]
+    if instrumentation is not None:
+        instrumentation.finish_iteration(2, nodes)
     return (best_move, best_eval)
     
-def initiate_one_player_checkers_game_vs_engine():
+# Note: the opening book and the alpha-beta search are imported inside the game functions because
+# their files import this one. Book moves are played without searching, and every other engine
+# move comes from an iterative deepening search that runs until its time limit is used up.
+
+DEFAULT_OPENING_BOOK_PATH = "checkers_opening_book.bin"
+
+DEFAULT_ENGINE_TIME_LIMIT = 2.0
+
+def open_opening_book(opening_book_path):
+    if opening_book_path is not None and os.path.exists(opening_book_path):
+        from checkers_engine_opening_book import OpeningBook
+        return OpeningBook(opening_book_path)
+    return None
+
+def create_engine_move_searcher(engine_time_limit):
+    from checkers_engine_search import MAX_SEARCH_DEPTH, alpha_beta_best_move_search
+    from checkers_engine_hashing import TranspositionTable
+    from checkers_engine_move_ordering import MoveOrdering
+    from checkers_engine_move_cache import LegalMoveCache
+    transposition_table = TranspositionTable()
+    move_ordering = MoveOrdering()
+    legal_move_cache = LegalMoveCache()
+
+    def search_engine_move(board_position, F_piece_color, E_piece_color, root_moves):
+        return alpha_beta_best_move_search(board_position, F_piece_color, E_piece_color,
+                                           max_depth=MAX_SEARCH_DEPTH,
+                                           transposition_table=transposition_table,
+                                           move_ordering=move_ordering,
+                                           time_limit=engine_time_limit,
+                                           root_moves=root_moves,
+                                           legal_move_cache=legal_move_cache)
+
+    return search_engine_move
+
+def initiate_one_player_checkers_game_vs_engine(opening_book_path=DEFAULT_OPENING_BOOK_PATH,
+                                                engine_time_limit=DEFAULT_ENGINE_TIME_LIMIT,
+                                                game_record_path=None):
+    opening_book = open_opening_book(opening_book_path)
+    search_engine_move = create_engine_move_searcher(engine_time_limit)
+    turn_move_cache = TurnMoveCache()
+    game_moves = []
     board_position = generate_starting_position()
     # board_position = generate_custom_position()
     whose_turn = 1
     while True:
-        any_legal_moves = list_all_possible_moves(board_position,
-                                                  BLACK_PIECE,
-                                                  "down")
-        if any_legal_moves:
+        if turn_move_cache.has_legal_move(board_position, BLACK_PIECE):
             print(f"Turn: \033[30;107mblack\033[0m\n")
             print_current_position(board_position)
-            play_turn(board_position, BLACK_PIECE)
+            game_moves.append(play_turn(board_position, BLACK_PIECE, turn_move_cache))
         else:
             print_current_position(board_position)
             print(f"\nGame over. \033[31;107mRed wins!\033[0m\n")
+            if game_record_path is not None:
+                save_game_record(game_record_path, game_moves, BLACK_PIECE)
             break
-        any_legal_moves = list_all_possible_moves(board_position,
-                                                  RED_PIECE,
-                                                  "up")
-        if any_legal_moves:
+        if turn_move_cache.has_legal_move(board_position, RED_PIECE):
             print(f"Turn: \033[31;107mred\033[0m\n")
             print_current_position(board_position)
-            move_search_info = minmax_best_move_search(board_position, RED_PIECE, BLACK_PIECE)
-            computer_move = move_search_info[0]
-            engine_eval = move_search_info[1]
-            print(f"\nComputer evaluates the position as {engine_eval}\n")
-            print(f"Computer plays the move {computer_move}\n")
+            legal_moves = turn_move_cache.get_legal_moves(board_position, RED_PIECE)
+            book_move = None
+            if opening_book is not None:
+                book_move = opening_book.probe(board_position, RED_PIECE, legal_moves)
+            if book_move is not None:
+                computer_move = book_move
+                print(f"\nComputer plays the book move {format_move(computer_move)}\n")
+            else:
+                search_result = search_engine_move(board_position, RED_PIECE, BLACK_PIECE,
+                                                   legal_moves)
+                computer_move = search_result.best_move
+                engine_eval = search_result.best_eval
+                print(f"\nComputer evaluates the position as {engine_eval} "
+                      f"(depth {search_result.depth})\n")
+                print(f"Computer plays the move {format_move(computer_move)}\n")
             update_board_position(computer_move, board_position)
+            game_moves.append(computer_move)
         else:
             print_current_position(board_position)
             print(f"\nGame over. \033[30;107mBlack wins!\033[0m\n")
+            if game_record_path is not None:
+                save_game_record(game_record_path, game_moves, RED_PIECE)
             break
         whose_turn = (whose_turn + 1) % 2
 
-initiate_one_player_checkers_game_vs_engine()
\ No newline at end of file
+if __name__ == "__main__":
+    initiate_one_player_checkers_game_vs_engine()
\ No newline at end of file
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+# LEGAL MOVE CACHE (LRU)
+
+# During engine play and analysis the same positions reach list_all_possible_moves over and over
+# again: in every iteration of an iterative deepening search, in sibling subtrees that transpose
+# into each other, and on consecutive turns of a game. A LegalMoveCache remembers the legal moves
+# of the most recently used positions, so each of them only has its moves generated once.
+
+# Cache keys are (packed position, side to move), where the packed position is the 32 square
+# values as bytes (the same packing the parallel search sends to its workers). The cache holds at
+# most max_size positions; when it is full, the position that was used the longest time ago is
+# dropped (least recently used eviction).
+
+# Note: the cached move lists are tuples, so a caller can't reorder or change the moves that
+# every later caller of the same position will get. Callers that want to sort the moves must make
+# their own list from them.
+
+from collections import OrderedDict
+
+from checkers_engine_mechanics import list_all_possible_moves
+
+DEFAULT_LEGAL_MOVE_CACHE_SIZE = 1 << 16
+
+class LegalMoveCache:
+    def __init__(self, max_size=DEFAULT_LEGAL_MOVE_CACHE_SIZE):
+        if max_size < 1:
+            raise ValueError(f"the cache size must be at least 1, got {max_size}")
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Takes the same arguments as list_all_possible_moves, so it can be used in its place.
+
+    def get_legal_moves(self, board_position, piece_color, vertical_search_direction):
+        cache_key = (bytes(board_position), piece_color)
+        entries = self.entries
+        legal_moves = entries.get(cache_key)
+        if legal_moves is not None:
+            self.hits += 1
+            entries.move_to_end(cache_key)
+            return legal_moves
+        self.misses += 1
+        legal_moves = tuple(list_all_possible_moves(board_position, piece_color,
+                                                    vertical_search_direction))
+        entries[cache_key] = legal_moves
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return legal_moves
+
+    def get_statistics(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
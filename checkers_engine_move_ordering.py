@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+# MOVE ORDERING (KILLER MOVES AND HISTORY HEURISTIC)
+
+# Alpha-beta only prunes well when the best move of a position is searched first, and
+# list_all_possible_moves returns its moves in board scan order. A MoveOrdering puts them in a
+# better order before they are searched:
+
+#   1. the hash move (the best move stored in the transposition table for the position),
+#   2. the killer moves of the ply (the last two moves that caused a cutoff at the same ply in a
+#      sibling position, which are often just as good here),
+#   3. every other move, by its history score (how much cutoff work the same from/to move has
+#      done anywhere in the tree so far).
+
+# Note: since captures are compulsory, a move list holds either only jumps or only simple moves,
+# so unlike chess there is no separate capture ordering and every move can be a killer.
+
+from checkers_engine_mechanics import MOVE_END_SHIFT
+
+# MOVE ORDERING CONSTANTS:
+
+# The history table is indexed by the from/to part of an encoded move (its lowest 12 bits).
+
+HISTORY_TABLE_SIZE = 1 << (2 * MOVE_END_SHIFT)
+FROM_TO_MASK = HISTORY_TABLE_SIZE - 1
+
+KILLER_SLOTS = 2
+MAX_KILLER_PLY = 128
+
+# Sort scores: the hash move and the killer moves always come before any history score.
+
+HASH_MOVE_SCORE = 1 << 40
+KILLER_MOVE_SCORE = 1 << 39
+
+# MOVE ORDERING OBJECT:
+
+class MoveOrdering:
+    def __init__(self):
+        self.killer_moves = [[None] * KILLER_SLOTS for ply in range(MAX_KILLER_PLY)]
+        self.history_scores = [0] * HISTORY_TABLE_SIZE
+        self.ordered_nodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.hash_move_cutoffs = 0
+        self.killer_move_cutoffs = 0
+        self.history_move_cutoffs = 0
+
+    # Returns the moves as a new list in search order (the moves passed in are left alone, so a
+    # cached tuple of moves can be ordered too). Moves with equal scores keep their generation
+    # order, so without any killers or history the order is the same as before.
+
+    def order_moves(self, moves, ply, hash_move=None):
+        self.ordered_nodes += 1
+        history_scores = self.history_scores
+        killers = self.killer_moves[ply] if ply < MAX_KILLER_PLY else ()
+
+        def get_move_score(move):
+            if move == hash_move:
+                return HASH_MOVE_SCORE
+            if move in killers:
+                return KILLER_MOVE_SCORE + KILLER_SLOTS - killers.index(move)
+            return history_scores[move & FROM_TO_MASK]
+
+        return sorted(moves, key=get_move_score, reverse=True)
+
+    # Called when a move fails high (alpha >= beta). move_number is the 0-based position of the
+    # move in the ordered list. Deeper cutoffs are worth more history, since they saved more work.
+
+    def record_cutoff(self, move, ply, depth, move_number, hash_move=None):
+        self.cutoffs += 1
+        if move_number == 0:
+            self.first_move_cutoffs += 1
+        if move == hash_move:
+            self.hash_move_cutoffs += 1
+        elif ply < MAX_KILLER_PLY and move in self.killer_moves[ply]:
+            self.killer_move_cutoffs += 1
+        else:
+            self.history_move_cutoffs += 1
+        if ply < MAX_KILLER_PLY:
+            killers = self.killer_moves[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        self.history_scores[move & FROM_TO_MASK] += depth * depth
+
+    # Between searches the killers are cleared (the plies no longer line up with the new root) and
+    # the history scores are halved, so old results still count but fade out over time.
+
+    def prepare_for_new_search(self):
+        for killers in self.killer_moves:
+            for slot in range(KILLER_SLOTS):
+                killers[slot] = None
+        history_scores = self.history_scores
+        for index in range(HISTORY_TABLE_SIZE):
+            history_scores[index] >>= 1
+
+    def get_cutoff_statistics(self):
+        cutoffs = self.cutoffs
+        return {
+            "ordered_nodes": self.ordered_nodes,
+            "cutoffs": cutoffs,
+            "cutoff_rate": cutoffs / self.ordered_nodes if self.ordered_nodes else 0.0,
+            "first_move_cutoff_rate": self.first_move_cutoffs / cutoffs if cutoffs else 0.0,
+            "hash_move_cutoffs": self.hash_move_cutoffs,
+            "killer_move_cutoffs": self.killer_move_cutoffs,
+            "history_move_cutoffs": self.history_move_cutoffs
+        }
+
+    def clear(self):
+        for killers in self.killer_moves:
+            for slot in range(KILLER_SLOTS):
+                killers[slot] = None
+        for index in range(HISTORY_TABLE_SIZE):
+            self.history_scores[index] = 0
+        self.ordered_nodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.hash_move_cutoffs = 0
+        self.killer_move_cutoffs = 0
+        self.history_move_cutoffs = 0
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+# POSITION NOTATION (FEN AND PACKED TEXT FORMS)
+
+# Positions are read from and written to text in two forms:
+
+# FEN: the PDN position notation, such as "B:W21,22,23,K32:B1,2,K9". The first letter is the side
+# to move, and each of the other two sections lists the squares of one color (a "K" in front of a
+# square marks a king, and "a-b" stands for every square from a to b). PDN calls the two sides
+# black ("B") and white ("W"). Black starts on squares 1 to 12 and moves first, just like black in
+# this engine, so PDN's white is this engine's red, and the square numbers are the same
+# coordinates this engine uses.
+
+# Packed: the three bitboards of the position in hex followed by the side to move, such as
+# "00000fff fff00000 00000000 B" (black pieces, red pieces, kings, with bit (coordinate - 1) set
+# for each coordinate, as in the bitboard file).
+
+from checkers_engine_mechanics import (
+    BLACK_PIECE, RED_PIECE, IS_KING, generate_position_from_coordinates
+)
+
+# NOTATION CONSTANTS:
+
+FEN_SIDE_LETTERS = {
+    BLACK_PIECE: "B",
+    RED_PIECE: "W"
+}
+
+FEN_PIECE_COLORS = {
+    "B": BLACK_PIECE,
+    "W": RED_PIECE
+}
+
+FEN_KING_PREFIX = "K"
+
+# A man that reaches the far back rank is crowned straight away, so an uncrowned black man can
+# never stand on 29-32 and an uncrowned red man can never stand on 1-4.
+
+PROMOTION_COORDINATES = {
+    BLACK_PIECE: range(29, 33),
+    RED_PIECE: range(1, 5)
+}
+
+def check_promotion_rows(pawns, piece_color, position_string):
+    for coordinate in pawns:
+        if coordinate in PROMOTION_COORDINATES[piece_color]:
+            raise ValueError(f"position {position_string!r} has an uncrowned man on its "
+                             f"promotion square {coordinate}")
+
+# FEN FUNCTIONS:
+
+def parse_fen_square_list(square_list_string):
+    pawns = []
+    kings = []
+    for square_string in square_list_string.split(","):
+        square_string = square_string.strip()
+        if not square_string:
+            continue
+        squares = kings if square_string.startswith(FEN_KING_PREFIX) else pawns
+        square_string = square_string.lstrip(FEN_KING_PREFIX)
+        first_square, _, last_square = square_string.partition("-")
+        last_square = last_square or first_square
+        if not first_square.isdigit() or not last_square.isdigit():
+            raise ValueError(f"bad FEN square {square_string!r}")
+        for coordinate in range(int(first_square), int(last_square) + 1):
+            if not 1 <= coordinate <= 32:
+                raise ValueError(f"FEN square {coordinate} is off the board")
+            squares.append(coordinate)
+    return (pawns, kings)
+
+# Returns (board position, side to move).
+
+def parse_fen_position(fen_string):
+    fen_sections = fen_string.strip().rstrip(".").split(":")
+    if len(fen_sections) != 3 or fen_sections[0].strip().upper() not in FEN_PIECE_COLORS:
+        raise ValueError(f"bad FEN position {fen_string!r}")
+    piece_color = FEN_PIECE_COLORS[fen_sections[0].strip().upper()]
+    color_squares = {}
+    for color_section in fen_sections[1:]:
+        color_section = color_section.strip()
+        color_letter = color_section[:1].upper()
+        if color_letter not in FEN_PIECE_COLORS or FEN_PIECE_COLORS[color_letter] in color_squares:
+            raise ValueError(f"bad FEN position {fen_string!r}")
+        color_squares[FEN_PIECE_COLORS[color_letter]] = parse_fen_square_list(color_section[1:])
+    black_pawns, black_kings = color_squares[BLACK_PIECE]
+    red_pawns, red_kings = color_squares[RED_PIECE]
+    occupied_squares = black_pawns + black_kings + red_pawns + red_kings
+    if len(set(occupied_squares)) != len(occupied_squares):
+        raise ValueError(f"FEN position {fen_string!r} puts two pieces on one square")
+    check_promotion_rows(black_pawns, BLACK_PIECE, fen_string)
+    check_promotion_rows(red_pawns, RED_PIECE, fen_string)
+    board_position = generate_position_from_coordinates(black_pawns, black_kings,
+                                                        red_pawns, red_kings)
+    return (board_position, piece_color)
+
+def format_fen_square_list(board_position, piece_color):
+    square_strings = []
+    for coordinate in range(1, 33):
+        square_value = board_position[coordinate - 1]
+        if square_value & piece_color:
+            if square_value & IS_KING:
+                square_strings.append(FEN_KING_PREFIX + str(coordinate))
+            else:
+                square_strings.append(str(coordinate))
+    return ",".join(square_strings)
+
+def format_fen_position(board_position, piece_color):
+    return f"{FEN_SIDE_LETTERS[piece_color]}" \
+           f":W{format_fen_square_list(board_position, RED_PIECE)}" \
+           f":B{format_fen_square_list(board_position, BLACK_PIECE)}"
+
+# PACKED TEXT FUNCTIONS:
+
+def parse_packed_position(packed_string):
+    packed_fields = packed_string.split()
+    if len(packed_fields) != 4 or packed_fields[3].upper() not in FEN_PIECE_COLORS:
+        raise ValueError(f"bad packed position {packed_string!r}")
+    try:
+        black, red, kings = (int(packed_field, 16) for packed_field in packed_fields[:3])
+    except ValueError:
+        raise ValueError(f"bad packed position {packed_string!r}") from None
+    if black & red or (black | red | kings) >> 32 or kings & ~(black | red):
+        raise ValueError(f"packed position {packed_string!r} is not a legal piece placement")
+    coordinate_lists = ([], [], [], [])
+    for coordinate in range(1, 33):
+        bit = 1 << (coordinate - 1)
+        if black & bit:
+            coordinate_lists[1 if kings & bit else 0].append(coordinate)
+        elif red & bit:
+            coordinate_lists[3 if kings & bit else 2].append(coordinate)
+    check_promotion_rows(coordinate_lists[0], BLACK_PIECE, packed_string)
+    check_promotion_rows(coordinate_lists[2], RED_PIECE, packed_string)
+    board_position = generate_position_from_coordinates(*coordinate_lists)
+    return (board_position, FEN_PIECE_COLORS[packed_fields[3].upper()])
+
+def format_packed_position(board_position, piece_color):
+    black = red = kings = 0
+    for index, square_value in enumerate(board_position):
+        bit = 1 << index
+        if square_value & BLACK_PIECE:
+            black |= bit
+        elif square_value & RED_PIECE:
+            red |= bit
+        if square_value & IS_KING:
+            kings |= bit
+    return f"{black:08x} {red:08x} {kings:08x} {FEN_SIDE_LETTERS[piece_color]}"
+
+# Lines with a colon are read as FEN, and anything else as a packed position.
+
+def parse_position_line(position_line):
+    if ":" in position_line:
+        return parse_fen_position(position_line)
+    return parse_packed_position(position_line)
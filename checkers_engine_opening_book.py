@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+
+# OPENING BOOK
+
+# The opening book records which moves were played from each early position in a collection of
+# games, along with how often each move was played and how those games turned out. The engine
+# looks the current position up in the book before searching, and if the position is there it
+# plays the book move straight away instead of spending search time on it.
+
+# Book file layout: a header followed by fixed-size entries sorted by Zobrist key. Every entry
+# holds one (position, move) pair and its statistics. Since the entries are sorted, a lookup is a
+# binary search over the memory-mapped file (O(log n) reads, with nothing loaded up front).
+
+import mmap
+import random
+import struct
+import sys
+
+from checkers_engine_mechanics import (
+    BLACK_PIECE, VERTICAL_SEARCH_DIRECTIONS, OPPOSING_PIECE_COLORS,
+    DEFAULT_OPENING_BOOK_PATH,
+    generate_starting_position, list_all_possible_moves, apply_move,
+    get_move_start_coordinate, get_move_end_coordinate, get_move_capture_mask
+)
+from checkers_engine_hashing import compute_zobrist_key, update_zobrist_key, TranspositionTable
+from checkers_engine_search import alpha_beta_best_move_search
+from checkers_engine_move_ordering import MoveOrdering
+
+# GAME RESULT CONSTANTS:
+
+# Game results are always given from black's point of view.
+
+BLACK_WIN = 1
+DRAW = 0
+RED_WIN = -1
+
+# OPENING BOOK FILE CONSTANTS:
+
+OPENING_BOOK_MAGIC = b"CKOB"
+OPENING_BOOK_VERSION = 1
+HEADER_FORMAT = "<4sHI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Entry layout: Zobrist key, start coordinate, end coordinate, capture mask (bit n - 1 set when
+# coordinate n is captured), games played, games won by the side that played the move, drawn games.
+
+ENTRY_FORMAT = "<QBBIIII"
+ENTRY_SIZE = struct.calcsize(ENTRY_FORMAT)
+KEY_FORMAT = "<Q"
+
+DEFAULT_MAX_BOOK_PLIES = 16
+
+# A move has to have been played in at least this many games to be written to the book or played
+# from it, so a line that only came up once (by chance) isn't trusted.
+
+DEFAULT_MINIMUM_BOOK_GAMES = 4
+
+# BOOK MOVE ENCODING:
+
+# The book entry fields are the same three fields that are packed into an engine move.
+
+def encode_book_move(move):
+    return (get_move_start_coordinate(move), get_move_end_coordinate(move),
+            get_move_capture_mask(move))
+
+# BOOK BUILDING FUNCTIONS:
+
+# A game record is a (moves, result, random plies) triple, where the moves are played in order
+# from the starting position and random plies holds the (0-based) plies whose moves were picked
+# at random (these are played through but not added to the book). Book statistics map (Zobrist
+# key, encoded move) to [games, wins, draws] for the side that played the move.
+
+def add_game_to_book_statistics(book_statistics, game_moves, game_result,
+                                max_book_plies=DEFAULT_MAX_BOOK_PLIES, random_plies=()):
+    board_position = generate_starting_position()
+    piece_color = BLACK_PIECE
+    zobrist_key = compute_zobrist_key(board_position, piece_color)
+    for ply, move in enumerate(game_moves[:max_book_plies]):
+        if ply not in random_plies:
+            move_statistics = book_statistics.setdefault((zobrist_key, encode_book_move(move)),
+                                                         [0, 0, 0])
+            move_statistics[0] += 1
+            if game_result == DRAW:
+                move_statistics[2] += 1
+            elif (game_result == BLACK_WIN) == (piece_color == BLACK_PIECE):
+                move_statistics[1] += 1
+        zobrist_key = update_zobrist_key(zobrist_key, move, board_position)
+        apply_move(move, board_position)
+        piece_color = OPPOSING_PIECE_COLORS[piece_color]
+
+def collect_book_statistics(game_records, max_book_plies=DEFAULT_MAX_BOOK_PLIES):
+    book_statistics = {}
+    for game_moves, game_result, random_plies in game_records:
+        add_game_to_book_statistics(book_statistics, game_moves, game_result, max_book_plies,
+                                    random_plies)
+    return book_statistics
+
+def write_opening_book(book_path, book_statistics, minimum_games=DEFAULT_MINIMUM_BOOK_GAMES):
+    book_entries = []
+    for (zobrist_key, book_move), move_statistics in book_statistics.items():
+        if move_statistics[0] >= minimum_games:
+            book_entries.append((zobrist_key, *book_move, *move_statistics))
+    book_entries.sort(key=lambda book_entry: (book_entry[0], -book_entry[4]))
+    with open(book_path, "wb") as book_file:
+        book_file.write(struct.pack(HEADER_FORMAT, OPENING_BOOK_MAGIC, OPENING_BOOK_VERSION,
+                                    len(book_entries)))
+        for book_entry in book_entries:
+            book_file.write(struct.pack(ENTRY_FORMAT, *book_entry))
+    return len(book_entries)
+
+# SELF-PLAY FUNCTIONS:
+
+# Self-play games play random_opening_plies random moves in a row, starting at first_random_ply,
+# so that the book covers more than one line, and are scored as draws if nobody has won after
+# max_game_plies. Each game is returned as a game record, so the random moves are left out of the
+# book.
+
+# Note: every other move is searched with a fresh transposition table and move ordering, so all
+# games play the same line up to their first random ply. Spreading first_random_ply over the book
+# plies (as generate_self_play_games does) lets the positions on that shared line, and on the
+# lines branching off it, collect enough games to reach the book's minimum.
+
+def play_self_play_game(search_depth, random_opening_plies, max_game_plies, move_generator,
+                        first_random_ply=0):
+    board_position = generate_starting_position()
+    piece_color = BLACK_PIECE
+    transposition_table = TranspositionTable(1 << 16)
+    move_ordering = MoveOrdering()
+    game_moves = []
+    random_plies = []
+    for ply in range(max_game_plies):
+        legal_moves = list_all_possible_moves(board_position, piece_color,
+                                              VERTICAL_SEARCH_DIRECTIONS[piece_color])
+        if not legal_moves:
+            if piece_color == BLACK_PIECE:
+                return (game_moves, RED_WIN, tuple(random_plies))
+            return (game_moves, BLACK_WIN, tuple(random_plies))
+        if first_random_ply <= ply < first_random_ply + random_opening_plies:
+            move = move_generator.choice(legal_moves)
+            random_plies.append(ply)
+        else:
+            move = alpha_beta_best_move_search(board_position, piece_color,
+                                               OPPOSING_PIECE_COLORS[piece_color],
+                                               max_depth=search_depth,
+                                               transposition_table=transposition_table,
+                                               move_ordering=move_ordering).best_move
+        game_moves.append(move)
+        apply_move(move, board_position)
+        piece_color = OPPOSING_PIECE_COLORS[piece_color]
+    return (game_moves, DRAW, tuple(random_plies))
+
+def generate_self_play_games(game_count, search_depth=4, random_opening_plies=4,
+                             max_game_plies=200, seed=None, max_book_plies=DEFAULT_MAX_BOOK_PLIES):
+    move_generator = random.Random(seed)
+    for game_number in range(game_count):
+        yield play_self_play_game(search_depth, random_opening_plies, max_game_plies,
+                                  move_generator, move_generator.randrange(max_book_plies))
+
+# OPENING BOOK PROBING:
+
+class OpeningBook:
+    def __init__(self, book_path, minimum_games=DEFAULT_MINIMUM_BOOK_GAMES):
+        self.book_file = open(book_path, "rb")
+        self.book_map = mmap.mmap(self.book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, entry_count = struct.unpack_from(HEADER_FORMAT, self.book_map, 0)
+        if magic != OPENING_BOOK_MAGIC or version != OPENING_BOOK_VERSION:
+            self.close()
+            raise ValueError(f"{book_path} is not a version {OPENING_BOOK_VERSION} opening book")
+        self.entry_count = entry_count
+        self.minimum_games = minimum_games
+        self.probes = 0
+        self.hits = 0
+
+    def read_entry_key(self, entry_number):
+        return struct.unpack_from(KEY_FORMAT, self.book_map,
+                                  HEADER_SIZE + entry_number * ENTRY_SIZE)[0]
+
+    def read_entry(self, entry_number):
+        return struct.unpack_from(ENTRY_FORMAT, self.book_map,
+                                  HEADER_SIZE + entry_number * ENTRY_SIZE)
+
+    # Binary search for the first entry with the given key, then read every entry with that key
+    # (they are stored next to each other, most played first).
+
+    def find_entries(self, zobrist_key):
+        low = 0
+        high = self.entry_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.read_entry_key(middle) < zobrist_key:
+                low = middle + 1
+            else:
+                high = middle
+        book_entries = []
+        entry_number = low
+        while entry_number < self.entry_count and self.read_entry_key(entry_number) == zobrist_key:
+            book_entries.append(self.read_entry(entry_number))
+            entry_number += 1
+        return book_entries
+
+    # Returns the legal book move (one of the moves in legal_moves) with the best score for the
+    # side that played it, (wins + draws / 2) / games, among the moves played in at least
+    # minimum_games games (ties go to the more played move). Returns None if there is no such move.
+
+    def probe(self, board_position, piece_color, legal_moves):
+        self.probes += 1
+        book_entries = self.find_entries(compute_zobrist_key(board_position, piece_color))
+        encoded_legal_moves = {encode_book_move(move): move for move in legal_moves}
+        best_move = None
+        best_ranking = None
+        for book_entry in book_entries:
+            move = encoded_legal_moves.get(book_entry[1:4])
+            games, wins, draws = book_entry[4:7]
+            if move is None or games < self.minimum_games:
+                continue
+            ranking = ((wins + draws / 2) / games, games)
+            if best_ranking is None or ranking > best_ranking:
+                best_move = move
+                best_ranking = ranking
+        if best_move is not None:
+            self.hits += 1
+        return best_move
+
+    def close(self):
+        self.book_map.close()
+        self.book_file.close()
+
+# Usage: checkers_engine_opening_book.py [game count] [search depth] [book path]
+
+if __name__ == "__main__":
+    self_play_game_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    self_play_search_depth = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    output_book_path = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_OPENING_BOOK_PATH
+    self_play_statistics = collect_book_statistics(
+        generate_self_play_games(self_play_game_count, self_play_search_depth))
+    written_entry_count = write_opening_book(output_book_path, self_play_statistics)
+    print(f"Wrote {written_entry_count} book entries to {output_book_path}")
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+# ROOT-PARALLEL MOVE SEARCH
+
+# The root moves of a position are independent of each other, so each one can be searched on a
+# different core. Every root move is handed to a worker process in a process pool, which plays
+# the move and runs the alpha-beta search for the other side one ply shallower. The negated
+# results are then compared to pick the best move, giving the same (best_move, best_eval) shape
+# that minmax_best_move_search returns.
+
+# Positions are sent to the workers as 32 raw bytes (one per square value) and moves as their
+# index in the list of legal moves, since the workers generate the same list in the same order.
+# This keeps the messages tiny compared with pickling the whole list of moves.
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from checkers_engine_mechanics import (
+    BLACK_PIECE, RED_PIECE, VERTICAL_SEARCH_DIRECTIONS,
+    generate_starting_position, list_all_possible_moves, apply_move, format_move
+)
+from checkers_engine_search import (
+    WIN_SCORE, WIN_SCORE_THRESHOLD, DEFAULT_SEARCH_DEPTH,
+    alpha_beta_best_move_search, quiescence_evaluation
+)
+from checkers_engine_hashing import TranspositionTable
+from checkers_engine_move_ordering import MoveOrdering
+
+# POSITION ENCODING FUNCTIONS:
+
+def encode_board_position(board_position):
+    return bytes(board_position)
+
+def decode_board_position(encoded_board_position):
+    return list(encoded_board_position)
+
+# WORKER FUNCTIONS:
+
+# Each worker process keeps its own transposition table and move ordering between tasks, so root
+# moves that lead to the same positions (and later searches from the same game) can reuse
+# earlier work.
+
+WORKER_TRANSPOSITION_TABLE = None
+WORKER_MOVE_ORDERING = None
+
+def initialize_search_worker():
+    global WORKER_TRANSPOSITION_TABLE, WORKER_MOVE_ORDERING
+    WORKER_TRANSPOSITION_TABLE = TranspositionTable()
+    WORKER_MOVE_ORDERING = MoveOrdering()
+
+# Note: the search in the worker starts one ply below the real root, so win and loss scores are
+# one ply further from the root than the worker's search reports.
+
+def convert_child_eval_to_root_eval(child_eval):
+    root_eval = -child_eval
+    if root_eval >= WIN_SCORE_THRESHOLD:
+        root_eval -= 1
+    elif root_eval <= -WIN_SCORE_THRESHOLD:
+        root_eval += 1
+    return root_eval
+
+def search_root_move(encoded_board_position, F_piece_color, E_piece_color, move_index, depth):
+    board_position = decode_board_position(encoded_board_position)
+    root_moves = list_all_possible_moves(board_position, F_piece_color,
+                                         VERTICAL_SEARCH_DIRECTIONS[F_piece_color])
+    apply_move(root_moves[move_index], board_position)
+    if depth <= 1:
+        child_eval = quiescence_evaluation(board_position, E_piece_color, F_piece_color)
+        return (move_index, convert_child_eval_to_root_eval(child_eval), 1)
+    search_result = alpha_beta_best_move_search(board_position, E_piece_color, F_piece_color,
+                                                max_depth=depth - 1,
+                                                transposition_table=WORKER_TRANSPOSITION_TABLE,
+                                                move_ordering=WORKER_MOVE_ORDERING)
+    return (move_index, convert_child_eval_to_root_eval(search_result.best_eval),
+            search_result.nodes)
+
+# PARALLEL SEARCH FUNCTIONS:
+
+def create_search_pool(worker_count=None):
+    if worker_count is None:
+        worker_count = os.cpu_count() or 1
+    return ProcessPoolExecutor(max_workers=worker_count, initializer=initialize_search_worker)
+
+# Returns (best_move, best_eval, nodes). An existing pool can be passed in to avoid starting new
+# worker processes for every search (for example, once per move of a game).
+
+def parallel_best_move_search_with_nodes(principal_board, F_piece_color, E_piece_color,
+                                         depth=DEFAULT_SEARCH_DEPTH, worker_count=None,
+                                         search_pool=None):
+    root_moves = list_all_possible_moves(principal_board, F_piece_color,
+                                         VERTICAL_SEARCH_DIRECTIONS[F_piece_color])
+    if not root_moves:
+        return (None, -WIN_SCORE, 0)
+    encoded_board_position = encode_board_position(principal_board)
+    owns_search_pool = search_pool is None
+    if owns_search_pool:
+        search_pool = create_search_pool(worker_count)
+    try:
+        futures = [search_pool.submit(search_root_move, encoded_board_position, F_piece_color,
+                                      E_piece_color, move_index, depth)
+                   for move_index in range(len(root_moves))]
+        root_results = [future.result() for future in futures]
+    finally:
+        if owns_search_pool:
+            search_pool.shutdown()
+    best_move = None
+    best_eval = -WIN_SCORE
+    total_nodes = 0
+    for move_index, move_eval, move_nodes in root_results:
+        total_nodes += move_nodes
+        if best_move is None or move_eval > best_eval:
+            best_move = root_moves[move_index]
+            best_eval = move_eval
+    return (best_move, best_eval, total_nodes)
+
+def parallel_best_move_search(principal_board, F_piece_color, E_piece_color,
+                              depth=DEFAULT_SEARCH_DEPTH, worker_count=None, search_pool=None):
+    best_move, best_eval, total_nodes = \
+        parallel_best_move_search_with_nodes(principal_board, F_piece_color, E_piece_color,
+                                             depth, worker_count, search_pool)
+    return (best_move, best_eval)
+
+# SPEEDUP REPORT FUNCTION:
+
+# Times the serial alpha-beta search and the root-parallel search on the same position and
+# depth. Both searches return exact scores for the best move, so their evals must agree (the
+# chosen moves can differ when two moves have the same score). The serial search gets a fresh
+# transposition table and move ordering, just like each new worker, so the speedup only measures
+# the gain from searching in parallel.
+
+def measure_parallel_speedup(principal_board, F_piece_color, E_piece_color,
+                             depth=DEFAULT_SEARCH_DEPTH, worker_count=None):
+    start_time = time.perf_counter()
+    serial_result = alpha_beta_best_move_search(principal_board, F_piece_color, E_piece_color,
+                                                max_depth=depth,
+                                                transposition_table=TranspositionTable(),
+                                                move_ordering=MoveOrdering())
+    serial_time = time.perf_counter() - start_time
+    search_pool = create_search_pool(worker_count)
+    try:
+        start_time = time.perf_counter()
+        parallel_move, parallel_eval, parallel_nodes = \
+            parallel_best_move_search_with_nodes(principal_board, F_piece_color, E_piece_color,
+                                                 depth, search_pool=search_pool)
+        parallel_time = time.perf_counter() - start_time
+    finally:
+        search_pool.shutdown()
+    return {
+        "depth": depth,
+        "worker_count": worker_count or os.cpu_count() or 1,
+        "serial_move": format_move(serial_result.best_move),
+        "serial_eval": serial_result.best_eval,
+        "serial_nodes": serial_result.nodes,
+        "serial_time": serial_time,
+        "parallel_move": format_move(parallel_move),
+        "parallel_eval": parallel_eval,
+        "parallel_nodes": parallel_nodes,
+        "parallel_time": parallel_time,
+        "speedup": serial_time / parallel_time if parallel_time > 0 else 0.0
+    }
+
+# Usage: checkers_engine_parallel_search.py [depth] [worker count]
+
+if __name__ == "__main__":
+    report_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    report_worker_count = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    speedup_report = measure_parallel_speedup(generate_starting_position(), BLACK_PIECE, RED_PIECE,
+                                              report_depth, report_worker_count)
+    for report_key, report_value in speedup_report.items():
+        print(f"{report_key}: {report_value}")
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+
+# PDN GAME RECORDS (READING, WRITING AND REPLAYING)
+
+# PDN (Portable Draughts Notation) is the usual file format for checkers games. A game is a list
+# of tags such as [Black "..."] or [Result "1-0"] followed by the moves, written with the 1-32
+# square numbers: "11-15" for a simple move and "15x24" (or "15x24x31" with every landing square)
+# for a jump. PDN's square numbers are the same as this engine's coordinates, and PDN's black and
+# white are this engine's black and red (see the notation file), so a PDN move is turned into an
+# engine move by matching it against the legal moves of the position it is played in.
+
+# Games are read lazily: read_pdn_games yields one game at a time from a file of any size, and
+# replay_pdn_game plays a game's moves one at a time on a single board, yielding each position
+# as it goes. Neither of them ever holds more than the current game in memory.
+
+# Note: results follow the checkers PDN habit of naming the first player (black) first, so "1-0"
+# is a black win and "0-1" is a red win.
+
+import re
+import sys
+
+from checkers_engine_mechanics import (
+    BLACK_PIECE, VERTICAL_SEARCH_DIRECTIONS, OPPOSING_PIECE_COLORS,
+    KING_JUMP_DIRECTIONS, NEIGHBOR_TABLE, JUMP_LANDING_TABLE,
+    generate_starting_position, list_all_possible_moves, update_board_position,
+    get_move_start_coordinate, get_move_end_coordinate, get_move_capture_mask, is_jump_move
+)
+from checkers_engine_notation import parse_fen_position, format_fen_position
+from checkers_engine_opening_book import (
+    BLACK_WIN, DRAW, RED_WIN, DEFAULT_OPENING_BOOK_PATH, collect_book_statistics, write_opening_book
+)
+
+# PDN CONSTANTS:
+
+PDN_RESULTS = {
+    "1-0": BLACK_WIN,
+    "2-0": BLACK_WIN,
+    "0-1": RED_WIN,
+    "0-2": RED_WIN,
+    "1/2-1/2": DRAW,
+    "1-1": DRAW,
+    "*": None
+}
+
+PDN_RESULT_STRINGS = {
+    BLACK_WIN: "1-0",
+    RED_WIN: "0-1",
+    DRAW: "1/2-1/2",
+    None: "*"
+}
+
+TAG_PATTERN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+MOVE_PATTERN = re.compile(r"\d+(?:[-x]\d+)+")
+MOVE_NUMBER_PATTERN = re.compile(r"^\d+\.+")
+ESCAPED_CHARACTER_PATTERN = re.compile(r"\\(.)")
+
+PDN_LINE_LENGTH = 79
+
+# PDN GAME OBJECT:
+
+class PdnGame:
+    def __init__(self, tags=None, move_notations=None, result="*"):
+        self.tags = tags if tags is not None else {}
+        self.move_notations = move_notations if move_notations is not None else []
+        self.result = result
+
+    # The game result as BLACK_WIN, DRAW or RED_WIN (None if the game has no result).
+
+    def get_result(self):
+        return PDN_RESULTS.get(self.result)
+
+# MOVE NOTATION FUNCTIONS:
+
+# The capture mask of a jump can be worked out from its landing squares alone, since each jump
+# lands two squares away from where it started, along one of the four diagonals.
+
+def get_jump_capture_mask(landing_squares):
+    capture_mask = 0
+    for current_square, next_square in zip(landing_squares, landing_squares[1:]):
+        for jump_direction in KING_JUMP_DIRECTIONS:
+            if jump_direction[JUMP_LANDING_TABLE][current_square] == next_square:
+                capture_mask |= 1 << (jump_direction[NEIGHBOR_TABLE][current_square] - 1)
+                break
+        else:
+            raise ValueError(f"{current_square}x{next_square} is not a jump")
+    return capture_mask
+
+# Goes the other way: finds an order in which the captures of a jump move can be made, and
+# returns the squares the jumping piece lands on along the way (starting with its start square).
+
+def find_jump_landing_squares(current_square, end_square, capture_mask, landing_squares):
+    if not capture_mask:
+        return current_square == end_square
+    for jump_direction in KING_JUMP_DIRECTIONS:
+        next_square = jump_direction[JUMP_LANDING_TABLE][current_square]
+        if next_square is None:
+            continue
+        jumpee_bit = 1 << (jump_direction[NEIGHBOR_TABLE][current_square] - 1)
+        if capture_mask & jumpee_bit:
+            landing_squares.append(next_square)
+            if find_jump_landing_squares(next_square, end_square, capture_mask & ~jumpee_bit,
+                                         landing_squares):
+                return True
+            landing_squares.pop()
+    return False
+
+def get_jump_landing_squares(move):
+    landing_squares = [get_move_start_coordinate(move)]
+    find_jump_landing_squares(landing_squares[0], get_move_end_coordinate(move),
+                              get_move_capture_mask(move), landing_squares)
+    return landing_squares
+
+def format_pdn_move(move):
+    if is_jump_move(move):
+        return "x".join(str(square) for square in get_jump_landing_squares(move))
+    return f"{get_move_start_coordinate(move)}-{get_move_end_coordinate(move)}"
+
+# Returns the legal move that the notation stands for. A jump written with only its start and end
+# squares must be the only legal jump between those squares.
+
+def parse_pdn_move(move_notation, legal_moves):
+    squares = [int(square) for square in re.split("[-x]", move_notation)]
+    for square in squares:
+        if not 1 <= square <= 32:
+            raise ValueError(f"{move_notation} has square {square}, which is off the board")
+    matching_moves = {move for move in legal_moves
+                      if get_move_start_coordinate(move) == squares[0] and
+                      get_move_end_coordinate(move) == squares[-1] and
+                      is_jump_move(move) == ("x" in move_notation)}
+    if len(squares) > 2:
+        capture_mask = get_jump_capture_mask(squares)
+        matching_moves = {move for move in matching_moves
+                          if get_move_capture_mask(move) == capture_mask}
+    if not matching_moves:
+        raise ValueError(f"{move_notation} is not a legal move")
+    if len(matching_moves) > 1:
+        raise ValueError(f"{move_notation} is ambiguous (give every landing square)")
+    return matching_moves.pop()
+
+# PDN READING FUNCTIONS:
+
+# Comments ({...} and ; to the end of the line), variations ((...), which can be nested) and
+# annotations ($ numbers, ! and ?) are skipped, and only the main line of moves is kept.
+
+def read_pdn_games(pdn_file):
+    tags = {}
+    move_notations = []
+    in_comment = False
+    variation_depth = 0
+    for line in pdn_file:
+        if not in_comment and not variation_depth and line.lstrip().startswith("["):
+            if move_notations:
+                yield PdnGame(tags, move_notations)
+                tags = {}
+                move_notations = []
+            for tag_name, tag_value in TAG_PATTERN.findall(line):
+                tags[tag_name] = ESCAPED_CHARACTER_PATTERN.sub(r"\1", tag_value)
+            continue
+        movetext = []
+        for character in line:
+            if in_comment:
+                in_comment = character != "}"
+            elif variation_depth:
+                if character == "(":
+                    variation_depth += 1
+                elif character == ")":
+                    variation_depth -= 1
+            elif character == "{":
+                in_comment = True
+                movetext.append(" ")
+            elif character == "(":
+                variation_depth = 1
+                movetext.append(" ")
+            elif character == ";":
+                break
+            else:
+                movetext.append(character)
+        for token in "".join(movetext).split():
+            token = MOVE_NUMBER_PATTERN.sub("", token).rstrip("!?")
+            if token in PDN_RESULTS:
+                yield PdnGame(tags, move_notations, token)
+                tags = {}
+                move_notations = []
+            elif MOVE_PATTERN.fullmatch(token):
+                move_notations.append(token)
+    if move_notations:
+        yield PdnGame(tags, move_notations)
+
+# Plays the game on a single board and yields (board position, side to move, move) before every
+# move, then (board position, side to move, None) for the final position. The same board is
+# updated after each yield, so a caller that keeps positions must copy them.
+
+def replay_pdn_game(pdn_game):
+    if "FEN" in pdn_game.tags:
+        board_position, piece_color = parse_fen_position(pdn_game.tags["FEN"])
+    else:
+        board_position, piece_color = (generate_starting_position(), BLACK_PIECE)
+    for move_notation in pdn_game.move_notations:
+        legal_moves = list_all_possible_moves(board_position, piece_color,
+                                              VERTICAL_SEARCH_DIRECTIONS[piece_color])
+        move = parse_pdn_move(move_notation, legal_moves)
+        yield (board_position, piece_color, move)
+        update_board_position(move, board_position)
+        piece_color = OPPOSING_PIECE_COLORS[piece_color]
+    yield (board_position, piece_color, None)
+
+# Yields (moves, result, ()) game records (the format collect_book_statistics in the opening book
+# file takes, with no random plies) for every game from the starting position with a
+# known result, so an opening book can be built straight from a PDN archive.
+
+def read_pdn_game_records(pdn_file):
+    for pdn_game in read_pdn_games(pdn_file):
+        game_result = pdn_game.get_result()
+        if game_result is None or "FEN" in pdn_game.tags:
+            continue
+        try:
+            game_moves = [move for board_position, piece_color, move in replay_pdn_game(pdn_game)
+                          if move is not None]
+        except ValueError:
+            continue
+        yield (game_moves, game_result, ())
+
+# PDN WRITING FUNCTIONS:
+
+# Tag values are written between double quotes, so backslashes and double quotes in them are
+# escaped with a backslash (read_pdn_games undoes this).
+
+def escape_tag_value(tag_value):
+    return str(tag_value).replace("\\", "\\\\").replace('"', '\\"')
+
+def format_pdn_movetext(moves, result_string, piece_color=BLACK_PIECE):
+    tokens = []
+    move_number = 1
+    for move in moves:
+        if piece_color == BLACK_PIECE:
+            tokens.append(f"{move_number}.")
+        elif not tokens:
+            tokens.append(f"{move_number}...")
+        tokens.append(format_pdn_move(move))
+        if piece_color != BLACK_PIECE:
+            move_number += 1
+        piece_color = OPPOSING_PIECE_COLORS[piece_color]
+    tokens.append(result_string)
+    lines = []
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > PDN_LINE_LENGTH:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return "\n".join(lines)
+
+# Formats one game. game_result is BLACK_WIN, DRAW, RED_WIN or None, and a FEN tag is added when
+# the game doesn't start from the starting position.
+
+def format_pdn_game(moves, game_result=None, tags=None, start_position=None):
+    result_string = PDN_RESULT_STRINGS[game_result]
+    pdn_tags = dict(tags) if tags is not None else {}
+    pdn_tags["Result"] = result_string
+    piece_color = BLACK_PIECE
+    if start_position is not None:
+        board_position, piece_color = start_position
+        pdn_tags["FEN"] = format_fen_position(board_position, piece_color)
+    tag_lines = [f'[{tag_name} "{escape_tag_value(tag_value)}"]'
+                 for tag_name, tag_value in pdn_tags.items()]
+    return "\n".join(tag_lines) + "\n\n" + format_pdn_movetext(moves, result_string, piece_color) + "\n"
+
+def write_pdn_game(pdn_file, moves, game_result=None, tags=None, start_position=None):
+    pdn_file.write(format_pdn_game(moves, game_result, tags, start_position) + "\n")
+
+def append_pdn_game(pdn_path, moves, game_result=None, tags=None, start_position=None):
+    with open(pdn_path, "a") as pdn_file:
+        write_pdn_game(pdn_file, moves, game_result, tags, start_position)
+
+# Usage: checkers_engine_pdn.py [PDN path] [book path]
+# (builds an opening book from every finished game in a PDN archive)
+
+if __name__ == "__main__":
+    input_pdn_path = sys.argv[1]
+    output_book_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_OPENING_BOOK_PATH
+    with open(input_pdn_path) as input_pdn_file:
+        pdn_book_statistics = collect_book_statistics(read_pdn_game_records(input_pdn_file))
+    written_entry_count = write_opening_book(output_book_path, pdn_book_statistics)
+    print(f"Wrote {written_entry_count} book entries to {output_book_path}")
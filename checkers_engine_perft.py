@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+# PERFT (PERFORMANCE TEST) NODE COUNTER
+
+# Perft walks the full move tree from a position to a fixed depth and counts the positions at the
+# bottom of the tree. The counts only depend on the rules, so they can be checked against known
+# values to catch move generation bugs, and timing them measures how fast moves are generated
+# and played. "Divide" mode splits the count up by root move, which narrows a wrong total down
+# to the move that causes it.
+
+import sys
+import time
+
+from checkers_engine_mechanics import (
+    BLACK_PIECE, RED_PIECE, VERTICAL_SEARCH_DIRECTIONS, OPPOSING_PIECE_COLORS,
+    generate_starting_position, generate_position_from_coordinates,
+    list_all_possible_moves, apply_move, undo_move, format_move
+)
+from checkers_engine_hashing import compute_zobrist_key, update_zobrist_key
+
+# KNOWN NODE COUNTS:
+
+# Starting position node counts (black to move) for standard 8x8 checkers with mandatory
+# captures, as published for English draughts perft.
+
+STARTING_POSITION_PERFT_COUNTS = {
+    1: 7,
+    2: 49,
+    3: 302,
+    4: 1469,
+    5: 7361,
+    6: 36768,
+    7: 179740,
+    8: 845931,
+    9: 3963680,
+    10: 18391564
+}
+
+# The other positions in the suite cover kings, multi-jumps, a king capture loop (two capture
+# orders that end on the same coordinate must count as one move) and king-only endgames. Their counts
+# were recorded from this engine after the list-of-bitmaps and bitboard move generators were
+# checked against each other, so they act as regression values.
+
+PERFT_SUITE = {
+    "starting position": (
+        (range(1, 13), (), range(21, 33), ()), BLACK_PIECE, STARTING_POSITION_PERFT_COUNTS
+    ),
+    "kings middlegame": (
+        ((5, 6, 9, 11), (18,), (22, 23, 26, 27), (15,)), BLACK_PIECE,
+        {1: 1, 2: 1, 3: 7, 4: 49, 5: 275, 6: 1848, 7: 10202}
+    ),
+    "king multi-jump": (
+        ((), (1,), (6, 7, 15, 16, 23, 24), ()), BLACK_PIECE,
+        {1: 4, 2: 26, 3: 64, 4: 306, 5: 878, 6: 4397, 7: 11635}
+    ),
+    "pawn double jumps": (
+        ((1, 2, 3, 9, 10), (), (13, 14, 21, 22, 29, 30), ()), BLACK_PIECE,
+        {1: 2, 2: 3, 3: 17, 4: 67, 5: 376, 6: 1508, 7: 6967}
+    ),
+    "king capture loop": (
+        ((), (3,), (6, 7, 8, 15, 16, 24), ()), BLACK_PIECE,
+        {1: 5, 2: 28, 3: 56, 4: 275, 5: 808, 6: 4167, 7: 11156}
+    ),
+    "kings endgame": (
+        ((), (1, 3), (), (30, 32)), RED_PIECE,
+        {1: 4, 2: 16, 3: 88, 4: 484, 5: 2706, 6: 15129, 7: 87192}
+    )
+}
+
+POSITION_COORDINATES = 0
+POSITION_COLOR = 1
+POSITION_COUNTS = 2
+
+# PERFT FUNCTIONS:
+
+def perft(board_position, piece_color, depth):
+    if depth == 0:
+        return 1
+    legal_moves = list_all_possible_moves(board_position, piece_color,
+                                          VERTICAL_SEARCH_DIRECTIONS[piece_color])
+    if depth == 1:
+        return len(legal_moves)
+    node_count = 0
+    for move in legal_moves:
+        undo_record = apply_move(move, board_position)
+        node_count += perft(board_position, OPPOSING_PIECE_COLORS[piece_color], depth - 1)
+        undo_move(undo_record, board_position)
+    return node_count
+
+def perft_divide(board_position, piece_color, depth):
+    divided_counts = []
+    legal_moves = list_all_possible_moves(board_position, piece_color,
+                                          VERTICAL_SEARCH_DIRECTIONS[piece_color])
+    for move in legal_moves:
+        undo_record = apply_move(move, board_position)
+        divided_counts.append((move, perft(board_position, OPPOSING_PIECE_COLORS[piece_color],
+                                           depth - 1)))
+        undo_move(undo_record, board_position)
+    return divided_counts
+
+# HASH-CACHED PERFT FUNCTIONS:
+
+# Different move orders often reach the same position, so the count below a (position, depth)
+# pair can be stored and reused. The Zobrist key already includes the side to move.
+
+def perft_with_hash_cache(board_position, piece_color, depth, zobrist_key=None, perft_cache=None):
+    if zobrist_key is None:
+        zobrist_key = compute_zobrist_key(board_position, piece_color)
+    if perft_cache is None:
+        perft_cache = {}
+    if depth == 0:
+        return 1
+    cached_count = perft_cache.get((zobrist_key, depth))
+    if cached_count is not None:
+        return cached_count
+    legal_moves = list_all_possible_moves(board_position, piece_color,
+                                          VERTICAL_SEARCH_DIRECTIONS[piece_color])
+    if depth == 1:
+        node_count = len(legal_moves)
+    else:
+        node_count = 0
+        for move in legal_moves:
+            child_zobrist_key = update_zobrist_key(zobrist_key, move, board_position)
+            undo_record = apply_move(move, board_position)
+            node_count += perft_with_hash_cache(board_position, OPPOSING_PIECE_COLORS[piece_color],
+                                                depth - 1, child_zobrist_key, perft_cache)
+            undo_move(undo_record, board_position)
+    perft_cache[(zobrist_key, depth)] = node_count
+    return node_count
+
+# PERFT REPORTING FUNCTIONS:
+
+def time_perft(board_position, piece_color, depth, use_hash_cache=False):
+    start_time = time.perf_counter()
+    if use_hash_cache:
+        node_count = perft_with_hash_cache(board_position, piece_color, depth)
+    else:
+        node_count = perft(board_position, piece_color, depth)
+    elapsed_time = time.perf_counter() - start_time
+    if elapsed_time > 0:
+        nodes_per_second = node_count / elapsed_time
+    else:
+        nodes_per_second = 0
+    return (node_count, elapsed_time, nodes_per_second)
+
+def print_perft_divide(board_position, piece_color, depth):
+    total_count = 0
+    for move, move_count in perft_divide(board_position, piece_color, depth):
+        print(f"{format_move(move)}: {move_count}")
+        total_count += move_count
+    print(f"\nTotal: {total_count}")
+    return total_count
+
+# Runs every suite position up to max_depth (or the deepest known count, if that is lower) and
+# prints the count, the time and the nodes per second for each depth. Returns the number of
+# counts that did not match, so a nonzero result means the move generator has regressed.
+
+def run_perft_suite(max_depth, use_hash_cache=False):
+    mismatches = 0
+    for position_name, position_info in PERFT_SUITE.items():
+        board_position = generate_position_from_coordinates(*position_info[POSITION_COORDINATES])
+        piece_color = position_info[POSITION_COLOR]
+        known_counts = position_info[POSITION_COUNTS]
+        print(f"\n{position_name}:")
+        for depth in range(1, min(max_depth, max(known_counts)) + 1):
+            node_count, elapsed_time, nodes_per_second = \
+                time_perft(board_position, piece_color, depth, use_hash_cache)
+            if node_count == known_counts[depth]:
+                status = "ok"
+            else:
+                status = f"MISMATCH (expected {known_counts[depth]})"
+                mismatches += 1
+            print(f"depth {depth}: {node_count} nodes in {elapsed_time:.3f}s "
+                  f"({nodes_per_second:.0f} nodes/sec) {status}")
+    return mismatches
+
+# Usage: checkers_engine_perft.py [max depth] [--hash]
+#        checkers_engine_perft.py --divide [depth]  (divides the starting position)
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    if "--divide" in arguments:
+        arguments.remove("--divide")
+        divide_depth = int(arguments[0]) if arguments else 4
+        print_perft_divide(generate_starting_position(), BLACK_PIECE, divide_depth)
+    else:
+        use_hash_cache = "--hash" in arguments
+        if use_hash_cache:
+            arguments.remove("--hash")
+        suite_depth = int(arguments[0]) if arguments else 5
+        sys.exit(1 if run_perft_suite(suite_depth, use_hash_cache) else 0)
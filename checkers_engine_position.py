@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+# POSITION OBJECT WITH INCREMENTAL PIECE COUNTS
+
+# A Position wraps a board position (the usual list of bitmaps) and keeps a count of the pawns
+# and kings of each color next to it. The counts are adjusted by every move that is applied or
+# undone through the Position, so the material balance can be read straight from the counts
+# instead of scanning all 32 squares at every leaf of a search.
+
+from checkers_engine_mechanics import (
+    BLACK_PIECE, RED_PIECE, BLACK_KING, RED_KING, IS_KING, ON_BACK_RANK, KING_WEIGHT,
+    apply_move, undo_move
+)
+
+# Note: piece_counts is indexed by square value without back rank info, so BLACK_PIECE, RED_PIECE,
+# BLACK_KING and RED_KING can be used directly as indices. Index 0 collects the empty squares
+# when the counts are first made and is not kept up to date after that.
+
+def count_pieces(board_position):
+    piece_counts = [0] * 7
+    for square_value in board_position:
+        piece_counts[square_value & ~ON_BACK_RANK] += 1
+    return piece_counts
+
+class Position:
+    def __init__(self, board_position):
+        self.board_position = board_position
+        self.piece_counts = count_pieces(board_position)
+
+    def get_pawn_count(self, piece_color):
+        return self.piece_counts[piece_color]
+
+    def get_king_count(self, piece_color):
+        return self.piece_counts[piece_color + IS_KING]
+
+    def get_piece_count(self):
+        piece_counts = self.piece_counts
+        return piece_counts[BLACK_PIECE] + piece_counts[BLACK_KING] + \
+               piece_counts[RED_PIECE] + piece_counts[RED_KING]
+
+    def get_material_count(self, piece_color):
+        return self.piece_counts[piece_color] + KING_WEIGHT * self.piece_counts[piece_color + IS_KING]
+
+    def evaluate_material_balance(self, F_piece_color, E_piece_color):
+        return self.get_material_count(F_piece_color) - self.get_material_count(E_piece_color)
+
+    # The undo records are the same ones used by apply_move / undo_move in the main engine file.
+    # A promotion shows up as the piece value changing between the start and end squares.
+
+    def apply_move(self, selected_move):
+        undo_record = apply_move(selected_move, self.board_position)
+        start_coordinate, start_value, end_coordinate, end_value, captured_square_values = undo_record
+        piece_counts = self.piece_counts
+        piece_counts[start_value & ~ON_BACK_RANK] -= 1
+        piece_counts[self.board_position[end_coordinate - 1] & ~ON_BACK_RANK] += 1
+        for capture, captured_value in captured_square_values:
+            piece_counts[captured_value & ~ON_BACK_RANK] -= 1
+        return undo_record
+
+    def undo_move(self, undo_record):
+        start_coordinate, start_value, end_coordinate, end_value, captured_square_values = undo_record
+        piece_counts = self.piece_counts
+        piece_counts[self.board_position[end_coordinate - 1] & ~ON_BACK_RANK] -= 1
+        piece_counts[start_value & ~ON_BACK_RANK] += 1
+        for capture, captured_value in captured_square_values:
+            piece_counts[captured_value & ~ON_BACK_RANK] += 1
+        undo_move(undo_record, self.board_position)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+# BINARY POSITION RECORDS AND DATASETS (NUMPY)
+
+# A board position is a list of 32 ints, which takes hundreds of bytes per position once training
+# or analysis sets grow to millions of positions. A position record stores the same position in
+# 13 bytes: the three bitboards of the bitboard file (black pieces, red pieces and kings, with bit
+# (coordinate - 1) set for each coordinate) as little-endian uint32s, followed by one byte for the
+# side to move (BLACK_PIECE or RED_PIECE). The back rank bits are not stored, since they only
+# depend on the coordinate, so every position comes back exactly as it went in.
+
+# A file of position records is read through a PositionDataset, which numpy.memmaps the file
+# instead of loading it: indexing a dataset only reads the records that are used, and slicing a
+# dataset gives a smaller dataset over the same memory without copying anything.
+
+# Note: like the batch evaluation file, this file needs numpy (for PositionDataset).
+
+import struct
+import sys
+
+import numpy as np
+
+from checkers_engine_mechanics import (
+    BLACK_PIECE, RED_PIECE, IS_KING, ON_BACK_RANK, generate_empty_board
+)
+from checkers_engine_bitboard import (
+    BitboardPosition, convert_board_to_bitboards, convert_bitboards_to_board
+)
+
+# POSITION RECORD CONSTANTS:
+
+POSITION_RECORD_FORMAT = "<IIIB"
+POSITION_RECORD_SIZE = struct.calcsize(POSITION_RECORD_FORMAT)
+
+POSITION_RECORD_DTYPE = np.dtype([
+    ("black", "<u4"),
+    ("red", "<u4"),
+    ("kings", "<u4"),
+    ("side", "u1")
+])
+
+BACK_RANK_SQUARE_VALUES = np.array(generate_empty_board(), dtype=np.uint8) & ON_BACK_RANK
+BIT_SHIFTS = np.arange(32, dtype=np.uint32)
+
+# POSITION RECORD FUNCTIONS:
+
+def pack_position_record(board_position, piece_color):
+    bitboard_position = convert_board_to_bitboards(board_position)
+    return struct.pack(POSITION_RECORD_FORMAT, bitboard_position.black, bitboard_position.red,
+                       bitboard_position.kings, piece_color)
+
+def check_position_record(black, red, kings, piece_color):
+    if black & red or kings & ~(black | red) or piece_color not in (BLACK_PIECE, RED_PIECE):
+        raise ValueError(f"position record {black:08x} {red:08x} {kings:08x} {piece_color} "
+                         f"is not a legal position")
+
+# Returns (board position, side to move).
+
+def unpack_position_record(record_bytes):
+    black, red, kings, piece_color = struct.unpack(POSITION_RECORD_FORMAT, record_bytes)
+    check_position_record(black, red, kings, piece_color)
+    return (convert_bitboards_to_board(BitboardPosition(black, red, kings)), piece_color)
+
+# Writes (board position, side to move) pairs as records and returns the number written. The
+# positions can come from a generator, so a dataset never has to be held in memory as lists.
+
+def write_position_records(record_file, positions):
+    record_count = 0
+    for board_position, piece_color in positions:
+        record_file.write(pack_position_record(board_position, piece_color))
+        record_count += 1
+    return record_count
+
+def read_position_records(record_file):
+    while True:
+        record_bytes = record_file.read(POSITION_RECORD_SIZE)
+        if len(record_bytes) < POSITION_RECORD_SIZE:
+            if record_bytes:
+                raise ValueError("the position record file ends in the middle of a record")
+            return
+        yield unpack_position_record(record_bytes)
+
+# POSITION DATASET OBJECT:
+
+# mode is the numpy.memmap mode: "r" to read, or "r+" to change records in place (through the
+# records array). An empty file gives an empty dataset, since an empty file can't be mapped.
+
+class PositionDataset:
+    def __init__(self, dataset_path=None, mode="r", records=None):
+        if records is None:
+            with open(dataset_path, "rb") as dataset_file:
+                dataset_file.seek(0, 2)
+                file_size = dataset_file.tell()
+            if file_size % POSITION_RECORD_SIZE:
+                raise ValueError(f"{dataset_path} is not a whole number of "
+                                 f"{POSITION_RECORD_SIZE} byte position records")
+            if file_size:
+                records = np.memmap(dataset_path, dtype=POSITION_RECORD_DTYPE, mode=mode)
+            else:
+                records = np.empty(0, dtype=POSITION_RECORD_DTYPE)
+        self.records = records
+
+    def __len__(self):
+        return len(self.records)
+
+    # An integer index gives (board position, side to move). A slice (or an index array) gives a
+    # PositionDataset over the selected records; slices share memory with this dataset, while
+    # index arrays are copied by numpy.
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            black, red, kings, piece_color = self.records[index].tolist()
+            check_position_record(black, red, kings, piece_color)
+            return (convert_bitboards_to_board(BitboardPosition(black, red, kings)), piece_color)
+        return PositionDataset(records=self.records[index])
+
+    def __iter__(self):
+        for index in range(len(self.records)):
+            yield self[index]
+
+    def get_side_to_move(self):
+        return self.records["side"]
+
+    # Returns every position as an (N, 32) uint8 array of square values, in the same encoding as
+    # the board lists (including the back rank bits), ready for the batch evaluation file.
+
+    def get_board_array(self):
+        records = self.records
+        black_bits = (records["black"][:, None] >> BIT_SHIFTS) & 1
+        red_bits = (records["red"][:, None] >> BIT_SHIFTS) & 1
+        king_bits = (records["kings"][:, None] >> BIT_SHIFTS) & 1
+        piece_values = black_bits * BLACK_PIECE | red_bits * RED_PIECE | king_bits * IS_KING
+        return piece_values.astype(np.uint8) | BACK_RANK_SQUARE_VALUES
+
+    def flush(self):
+        if isinstance(self.records, np.memmap):
+            self.records.flush()
+
+def write_position_dataset(dataset_path, positions):
+    with open(dataset_path, "wb") as dataset_file:
+        return write_position_records(dataset_file, positions)
+
+# Usage: checkers_engine_position_records.py [input path] [dataset path]
+# (the input is a file of FEN or packed positions, one per line, or a PDN file, in which case
+# every position of every game is written)
+
+if __name__ == "__main__":
+    input_path = sys.argv[1]
+    output_dataset_path = sys.argv[2]
+    with open(input_path) as input_file:
+        if input_path.lower().endswith(".pdn"):
+            from checkers_engine_pdn import read_pdn_games, replay_pdn_game
+            input_positions = ((board_position, piece_color)
+                               for pdn_game in read_pdn_games(input_file)
+                               for board_position, piece_color, move in replay_pdn_game(pdn_game))
+        else:
+            from checkers_engine_notation import parse_position_line
+            from checkers_engine_analysis import read_numbered_position_lines
+            input_positions = (parse_position_line(position_line) for line_number, position_line
+                               in read_numbered_position_lines(input_file))
+        written_record_count = write_position_dataset(output_dataset_path, input_positions)
+    print(f"Wrote {written_record_count} position records to {output_dataset_path}")
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+
+# ALPHA-BETA MOVE SEARCH
+
+# This file holds the deeper successor to minmax_best_move_search. The search is written in
+# negamax form: every position is scored from the point of view of the side to move, so the
+# score of a child position is simply negated on the way back up the tree. Iterative deepening
+# searches depth 1, then depth 2, and so on until the requested depth is reached or the node
+# budget runs out, and the result of the last completed depth is the one that gets returned.
+# The whole tree is walked on the caller's board with apply_move / undo_move (through a Position,
+# which keeps the piece counts that the leaf evaluation reads), so the board is back in its
+# original state when the search returns.
+
+import time
+
+from checkers_engine_mechanics import (
+    VERTICAL_SEARCH_DIRECTIONS, list_all_possible_moves, list_all_jump_moves, has_legal_move,
+    format_move
+)
+from checkers_engine_hashing import (
+    EXACT_BOUND, LOWER_BOUND, UPPER_BOUND,
+    ENTRY_DEPTH, ENTRY_SCORE, ENTRY_BOUND, ENTRY_BEST_MOVE,
+    compute_zobrist_key, update_zobrist_key
+)
+from checkers_engine_position import Position
+from checkers_engine_instrumentation import MOVE_GENERATION, BOARD_UPDATE, EVALUATION
+from checkers_engine_tablebase import TABLEBASE_WIN, TABLEBASE_LOSS
+
+# SEARCH CONSTANTS:
+
+# A position where the side to move has no legal moves is lost. The ply number is taken off the
+# win score so that the search prefers the quickest win and the slowest loss.
+
+WIN_SCORE = 1000
+INFINITE_SCORE = 10000
+
+# Scores this close to WIN_SCORE are wins or losses a known number of plies from the node where
+# they were found. They are stored in the transposition table relative to the stored node (not
+# the root) so that they stay correct when the same position turns up at a different ply.
+
+WIN_SCORE_THRESHOLD = WIN_SCORE - 200
+
+DEFAULT_SEARCH_DEPTH = 8
+
+# A search with a time limit usually runs with max_depth=MAX_SEARCH_DEPTH and stops on the clock.
+
+MAX_SEARCH_DEPTH = 64
+
+# The clock and the stop event are only checked once every STOP_CHECK_INTERVAL nodes, since
+# reading the clock at every node would cost more than the node itself.
+
+STOP_CHECK_INTERVAL = 256
+
+# The most nodes a single quiescence search (started from one leaf of the main search) may visit
+# before the rest of it falls back to the static evaluation.
+
+DEFAULT_QUIESCENCE_NODE_LIMIT = 1000
+
+# SEARCH STATE AND RESULT OBJECTS:
+
+# The search calls move generation, board updates and the evaluation through the function
+# attributes of its SearchState. They are the plain functions, or timed versions of them when the
+# search is given a SearchInstrumentation. When the search is given a LegalMoveCache, the moves
+# come from the cache (as tuples, which the search never changes).
+
+# Note: the deadline is a time.monotonic() value, and the stop event can be any object with an
+# is_set() method (such as a threading.Event) that another thread sets to stop the search.
+
+class SearchState:
+    def __init__(self, node_limit, transposition_table, tablebase, move_ordering=None,
+                 quiescence_node_limit=None, instrumentation=None, deadline=None,
+                 stop_event=None, legal_move_cache=None):
+        self.nodes = 0
+        self.node_limit = node_limit
+        self.deadline = deadline
+        self.stop_event = stop_event
+        self.next_stop_check = 0
+        self.transposition_table = transposition_table
+        self.tablebase = tablebase
+        self.move_ordering = move_ordering
+        self.quiescence_node_limit = quiescence_node_limit
+        self.quiescence_nodes = 0
+        self.quiescence_nodes_left = 0
+        self.aborted = False
+        self.finishing_first_iteration = False
+        self.instrumentation = instrumentation
+        self.generate_moves = list_all_possible_moves
+        if legal_move_cache is not None:
+            self.generate_moves = legal_move_cache.get_legal_moves
+        self.generate_jump_moves = list_all_jump_moves
+        self.has_legal_move = has_legal_move
+        self.apply_move = Position.apply_move
+        self.undo_move = Position.undo_move
+        self.evaluate = Position.evaluate_material_balance
+        if instrumentation is not None:
+            self.generate_moves = instrumentation.wrap_move_generator(self.generate_moves)
+            self.generate_jump_moves = instrumentation.wrap(MOVE_GENERATION, list_all_jump_moves)
+            self.has_legal_move = instrumentation.wrap(MOVE_GENERATION, has_legal_move)
+            self.apply_move = instrumentation.wrap(BOARD_UPDATE, Position.apply_move)
+            self.undo_move = instrumentation.wrap(BOARD_UPDATE, Position.undo_move)
+            self.evaluate = instrumentation.wrap(EVALUATION, Position.evaluate_material_balance)
+
+    # Returns True once the node limit or the deadline has been passed or the stop event is set,
+    # and otherwise schedules the next check. The deadline doesn't stop the first iteration, so a
+    # search on the clock always returns at least a depth 1 result.
+
+    def should_stop(self):
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            return True
+        if self.deadline is not None and not self.finishing_first_iteration and \
+           time.monotonic() >= self.deadline:
+            return True
+        if self.stop_event is not None and self.stop_event.is_set():
+            return True
+        self.next_stop_check = self.nodes + STOP_CHECK_INTERVAL
+        if self.node_limit is not None and self.next_stop_check > self.node_limit + 1:
+            self.next_stop_check = self.node_limit + 1
+        return False
+
+class SearchResult:
+    def __init__(self):
+        self.best_move = None
+        self.best_eval = None
+        self.principal_variation = []
+        self.depth = 0
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.nodes_per_depth = []
+        self.elapsed_time = 0.0
+        self.instrumentation_report = None
+
+    def __str__(self):
+        principal_variation = " ".join(format_move(move) for move in self.principal_variation)
+        return f"depth {self.depth} eval {self.best_eval} nodes {self.nodes} pv {principal_variation}"
+
+# TRANSPOSITION TABLE SCORE FUNCTIONS:
+
+def score_to_transposition_table(score, ply):
+    if score >= WIN_SCORE_THRESHOLD:
+        return score + ply
+    elif score <= -WIN_SCORE_THRESHOLD:
+        return score - ply
+    return score
+
+def score_from_transposition_table(score, ply):
+    if score >= WIN_SCORE_THRESHOLD:
+        return score - ply
+    elif score <= -WIN_SCORE_THRESHOLD:
+        return score + ply
+    return score
+
+def get_transposition_table_bound(score, original_alpha, beta):
+    if score <= original_alpha:
+        return UPPER_BOUND
+    elif score >= beta:
+        return LOWER_BOUND
+    return EXACT_BOUND
+
+# TABLEBASE SCORE FUNCTION:
+
+# Tablebase distances count plies from the probed position, so the ply of that position is added
+# to turn them into the same root-relative win and loss scores the search uses.
+
+def convert_tablebase_result_to_score(tablebase_result, ply):
+    result, plies = tablebase_result
+    if result == TABLEBASE_WIN:
+        return WIN_SCORE - (ply + plies)
+    elif result == TABLEBASE_LOSS:
+        return (ply + plies) - WIN_SCORE
+    return 0
+
+# QUIESCENCE SEARCH FUNCTION:
+
+# A leaf of the main search can sit in the middle of an exchange, where the static evaluation is
+# off by the pieces about to be recaptured. Quiescence search keeps playing moves from such a
+# leaf only while the side to move has jumps (which are compulsory, so there is no option of
+# standing pat), and scores a position statically once it is quiet. Its nodes are counted apart
+# from the main search's nodes, and once a quiescence search has used up its own node limit the
+# rest of it is scored statically. A quiet position where the side to move has no legal move at
+# all is lost, and is scored as a loss at its ply, just like in the main search.
+
+def quiescence_search(position, F_piece_color, E_piece_color, alpha, beta, ply, search_state):
+    search_state.quiescence_nodes += 1
+    search_state.quiescence_nodes_left -= 1
+    if search_state.quiescence_nodes_left < 0:
+        return (search_state.evaluate(position, F_piece_color, E_piece_color), [])
+    F_jump_moves = search_state.generate_jump_moves(position.board_position, F_piece_color,
+                                                     VERTICAL_SEARCH_DIRECTIONS[F_piece_color])
+    if not F_jump_moves:
+        if not search_state.has_legal_move(position.board_position, F_piece_color,
+                                           VERTICAL_SEARCH_DIRECTIONS[F_piece_color]):
+            return (ply - WIN_SCORE, [])
+        return (search_state.evaluate(position, F_piece_color, E_piece_color), [])
+    best_eval = -INFINITE_SCORE
+    best_line = []
+    for F_move in F_jump_moves:
+        undo_record = search_state.apply_move(position, F_move)
+        child_eval, child_line = quiescence_search(position, E_piece_color, F_piece_color,
+                                                   -beta, -alpha, ply + 1, search_state)
+        search_state.undo_move(position, undo_record)
+        move_eval = -child_eval
+        if move_eval > best_eval:
+            best_eval = move_eval
+            best_line = [F_move] + child_line
+        if move_eval > alpha:
+            alpha = move_eval
+        if alpha >= beta:
+            break
+    return (best_eval, best_line)
+
+# Scores a single position the way a leaf of the main search is scored.
+
+def quiescence_evaluation(board_position, F_piece_color, E_piece_color,
+                          quiescence_node_limit=DEFAULT_QUIESCENCE_NODE_LIMIT):
+    search_state = SearchState(None, None, None, quiescence_node_limit=quiescence_node_limit)
+    search_state.quiescence_nodes_left = quiescence_node_limit
+    return quiescence_search(Position(board_position), F_piece_color, E_piece_color,
+                             -INFINITE_SCORE, INFINITE_SCORE, 0, search_state)[0]
+
+# NEGAMAX FUNCTIONS:
+
+# Each call returns the score of the position together with the principal variation (the line of
+# best play) found below it. An aborted search unwinds with a dummy score that is thrown away.
+
+# Note: when a transposition table is in use, a stored entry that was searched at least as deep
+# as the current node can end the search of that node right away (if its bound allows it), and
+# the stored best move is searched first otherwise. When a tablebase is in use, any position with
+# few enough pieces is scored exactly from the tablebase instead of being searched. When a
+# MoveOrdering is in use, it sorts the moves (hash move, killers, history) and is told about
+# every cutoff.
+
+def negamax_search(position, F_piece_color, E_piece_color, depth, alpha, beta, ply,
+                   zobrist_key, search_state):
+    search_state.nodes += 1
+    if search_state.nodes >= search_state.next_stop_check and search_state.should_stop():
+        search_state.aborted = True
+        return (0, [])
+    tablebase = search_state.tablebase
+    if tablebase is not None and position.get_piece_count() <= tablebase.max_pieces:
+        tablebase_result = tablebase.probe(position.board_position, F_piece_color)
+        if tablebase_result is not None:
+            return (convert_tablebase_result_to_score(tablebase_result, ply), [])
+    if depth == 0:
+        if search_state.quiescence_node_limit is None:
+            return (search_state.evaluate(position, F_piece_color, E_piece_color), [])
+        search_state.quiescence_nodes_left = search_state.quiescence_node_limit
+        return quiescence_search(position, F_piece_color, E_piece_color, alpha, beta, ply,
+                                 search_state)
+    transposition_table = search_state.transposition_table
+    hash_move = None
+    if transposition_table is not None:
+        entry = transposition_table.probe(zobrist_key)
+        if entry is not None:
+            hash_move = entry[ENTRY_BEST_MOVE]
+            if entry[ENTRY_DEPTH] >= depth:
+                entry_score = score_from_transposition_table(entry[ENTRY_SCORE], ply)
+                entry_bound = entry[ENTRY_BOUND]
+                if entry_bound == EXACT_BOUND or \
+                   (entry_bound == LOWER_BOUND and entry_score >= beta) or \
+                   (entry_bound == UPPER_BOUND and entry_score <= alpha):
+                    return (entry_score, [hash_move])
+    F_legal_moves = search_state.generate_moves(position.board_position, F_piece_color,
+                                                VERTICAL_SEARCH_DIRECTIONS[F_piece_color])
+    if not F_legal_moves:
+        return (ply - WIN_SCORE, [])
+    move_ordering = search_state.move_ordering
+    if move_ordering is not None:
+        F_legal_moves = move_ordering.order_moves(F_legal_moves, ply, hash_move)
+    elif hash_move is not None and hash_move in F_legal_moves:
+        F_legal_moves = [hash_move] + [F_move for F_move in F_legal_moves if F_move != hash_move]
+    original_alpha = alpha
+    best_eval = -INFINITE_SCORE
+    best_line = []
+    child_zobrist_key = None
+    for move_number, F_move in enumerate(F_legal_moves):
+        if transposition_table is not None:
+            child_zobrist_key = update_zobrist_key(zobrist_key, F_move, position.board_position)
+        undo_record = search_state.apply_move(position, F_move)
+        child_eval, child_line = negamax_search(position, E_piece_color, F_piece_color,
+                                                depth - 1, -beta, -alpha, ply + 1,
+                                                child_zobrist_key, search_state)
+        search_state.undo_move(position, undo_record)
+        if search_state.aborted:
+            return (0, [])
+        move_eval = -child_eval
+        if move_eval > best_eval:
+            best_eval = move_eval
+            best_line = [F_move] + child_line
+        if move_eval > alpha:
+            alpha = move_eval
+        if alpha >= beta:
+            if move_ordering is not None:
+                move_ordering.record_cutoff(F_move, ply, depth, move_number, hash_move)
+            break
+    if transposition_table is not None:
+        transposition_table.store(zobrist_key, depth, score_to_transposition_table(best_eval, ply),
+                                  get_transposition_table_bound(best_eval, original_alpha, beta),
+                                  best_line[0])
+    return (best_eval, best_line)
+
+def search_root_moves(principal_position, F_piece_color, E_piece_color, root_moves, depth,
+                      root_zobrist_key, search_state):
+    alpha = -INFINITE_SCORE
+    best_move = None
+    best_line = []
+    child_zobrist_key = None
+    for F_move in root_moves:
+        if search_state.transposition_table is not None:
+            child_zobrist_key = update_zobrist_key(root_zobrist_key, F_move,
+                                                   principal_position.board_position)
+        undo_record = search_state.apply_move(principal_position, F_move)
+        child_eval, child_line = negamax_search(principal_position, E_piece_color, F_piece_color,
+                                                depth - 1, -INFINITE_SCORE, -alpha, 1,
+                                                child_zobrist_key, search_state)
+        search_state.undo_move(principal_position, undo_record)
+        if search_state.aborted:
+            return None
+        move_eval = -child_eval
+        if best_move is None or move_eval > alpha:
+            alpha = move_eval
+            best_move = F_move
+            best_line = [F_move] + child_line
+    return (best_move, alpha, best_line)
+
+# ITERATIVE DEEPENING FUNCTIONS:
+
+def get_search_summary(search_result, search_state):
+    search_summary = {
+        "best_move": format_move(search_result.best_move) if search_result.best_move is not None else None,
+        "best_eval": search_result.best_eval,
+        "depth": search_result.depth,
+        "nodes": search_result.nodes,
+        "quiescence_nodes": search_result.quiescence_nodes,
+        "aborted": search_state.aborted
+    }
+    transposition_table = search_state.transposition_table
+    if transposition_table is not None:
+        search_summary["transposition_table"] = {
+            "probes": transposition_table.probes,
+            "hits": transposition_table.hits,
+            "stores": transposition_table.stores
+        }
+    if search_state.move_ordering is not None:
+        search_summary["move_ordering"] = search_state.move_ordering.get_cutoff_statistics()
+    return search_summary
+
+def finish_search_result(search_result, search_state, start_time):
+    search_result.elapsed_time = time.monotonic() - start_time
+    search_result.nodes = search_state.nodes
+    search_result.quiescence_nodes = search_state.quiescence_nodes
+    if search_state.instrumentation is not None:
+        search_result.instrumentation_report = \
+            search_state.instrumentation.get_report(get_search_summary(search_result, search_state))
+    return search_result
+
+# Note: the best move of the previous depth is searched first at the next depth, which gives the
+# alpha-beta window a good bound early and makes the deeper iterations much cheaper. Passing the
+# same transposition table to consecutive searches lets later moves reuse earlier results, and
+# passing an open Tablebase lets the search score small endgames exactly. The same goes for a
+# MoveOrdering, whose history scores carry over (halved) from one search to the next. Leaves are
+# scored by quiescence search unless quiescence_node_limit is None. Passing a
+# SearchInstrumentation fills in the instrumentation_report of the result.
+
+# Time management: time_limit (seconds from the start of the search) and deadline (a
+# time.monotonic() value) stop the search on the clock, and stop_event stops it from another
+# thread. Whichever comes first wins. A search that is stopped part way through an iteration
+# throws that iteration away and returns the result of the last completed one, and no new
+# iteration is started once the time is up. The depth 1 iteration is always finished when only
+# the time is up (it is cheap), so a search on the clock always returns a move with an eval. The
+# stop event and the node limit stop even the first iteration, and a search stopped before any
+# iteration has finished returns the first root move with no eval (best_eval None, depth 0).
+
+# Note: root_moves can be passed in when the caller already has the legal moves of the position
+# (the search works on its own copy of them, since it reorders them between iterations). Passing
+# the same LegalMoveCache to consecutive searches lets them share their move generation.
+
+def alpha_beta_best_move_search(principal_board, F_piece_color, E_piece_color,
+                                max_depth=DEFAULT_SEARCH_DEPTH, node_limit=None,
+                                transposition_table=None, tablebase=None, move_ordering=None,
+                                quiescence_node_limit=DEFAULT_QUIESCENCE_NODE_LIMIT,
+                                instrumentation=None, time_limit=None, deadline=None,
+                                stop_event=None, root_moves=None, legal_move_cache=None):
+    start_time = time.monotonic()
+    if time_limit is not None and (deadline is None or start_time + time_limit < deadline):
+        deadline = start_time + time_limit
+    search_result = SearchResult()
+    if instrumentation is not None:
+        instrumentation.reset()
+    search_state = SearchState(node_limit, transposition_table, tablebase, move_ordering,
+                               quiescence_node_limit, instrumentation, deadline, stop_event,
+                               legal_move_cache)
+    if move_ordering is not None:
+        move_ordering.prepare_for_new_search()
+    principal_position = Position(principal_board)
+    root_zobrist_key = None
+    if transposition_table is not None:
+        root_zobrist_key = compute_zobrist_key(principal_board, F_piece_color)
+    if root_moves is None:
+        root_moves = search_state.generate_moves(principal_board, F_piece_color,
+                                                 VERTICAL_SEARCH_DIRECTIONS[F_piece_color])
+    root_moves = list(root_moves)
+    if not root_moves:
+        search_result.best_eval = -WIN_SCORE
+        return finish_search_result(search_result, search_state, start_time)
+    search_result.best_move = root_moves[0]
+    for depth in range(1, max_depth + 1):
+        if depth > 1 and search_state.should_stop():
+            search_state.aborted = True
+            break
+        nodes_before_iteration = search_state.nodes
+        quiescence_nodes_before_iteration = search_state.quiescence_nodes
+        if instrumentation is not None:
+            instrumentation.start_iteration()
+        search_state.finishing_first_iteration = depth == 1
+        root_search_info = search_root_moves(principal_position, F_piece_color, E_piece_color,
+                                             root_moves, depth, root_zobrist_key, search_state)
+        search_state.finishing_first_iteration = False
+        if root_search_info is None:
+            break
+        best_move, best_eval, principal_variation = root_search_info
+        search_result.best_move = best_move
+        search_result.best_eval = best_eval
+        search_result.principal_variation = principal_variation
+        search_result.depth = depth
+        search_result.nodes_per_depth.append(search_state.nodes - nodes_before_iteration)
+        if instrumentation is not None:
+            instrumentation.finish_iteration(depth, search_state.nodes - nodes_before_iteration,
+                                             search_state.quiescence_nodes -
+                                             quiescence_nodes_before_iteration)
+        root_moves.remove(best_move)
+        root_moves.insert(0, best_move)
+        if abs(best_eval) >= WIN_SCORE - max_depth:
+            break
+    return finish_search_result(search_result, search_state, start_time)
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+
+# ASYNCIO GAME SERVER (PLAY THE ENGINE OVER A SOCKET)
+
+# Serves games against the engine to many players at once, over local TCP or a Unix socket. Each
+# connection is one session with its own board, and the engine plays the other side. Engine
+# searches run in a process pool, so the event loop keeps serving every other session while a
+# slow search is going on.
+
+# The protocol is one command per line, and every command gets exactly one line back. Moves are
+# written in PDN notation (see the PDN file), and positions in FEN (see the notation file):
+
+#   NEW [black|red] [FEN]  start a new game (as black from the starting position by default)
+#   MOVE <move>            play a move; the engine answers right away
+#   MOVES                  list the legal moves of the player
+#   POSITION               show the position
+#   QUIT                   close the session
+
+# NEW and MOVE answer "PLAYED <player move> <engine move> <status> <FEN>", where a move is "-"
+# if it wasn't played, and the status is "*" while the game is on or the PDN result ("1-0",
+# "0-1") once the side to move has no legal move left. POSITION answers "POSITION <status> <FEN>",
+# MOVES answers "MOVES <move> <move> ...", QUIT answers "BYE", and anything that fails answers
+# "ERROR <message>" and leaves the session as it was.
+
+import argparse
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from checkers_engine_mechanics import (
+    BLACK_PIECE, RED_PIECE, OPPOSING_PIECE_COLORS, DEFAULT_OPENING_BOOK_PATH,
+    DEFAULT_ENGINE_TIME_LIMIT, TurnMoveCache, generate_starting_position, update_board_position,
+    open_opening_book
+)
+from checkers_engine_notation import parse_fen_position, format_fen_position
+from checkers_engine_pdn import (
+    PDN_RESULT_STRINGS, MOVE_PATTERN, format_pdn_move, parse_pdn_move, append_pdn_game
+)
+from checkers_engine_opening_book import BLACK_WIN, RED_WIN
+from checkers_engine_parallel_search import encode_board_position, decode_board_position
+from checkers_engine_hashing import TranspositionTable
+from checkers_engine_move_ordering import MoveOrdering
+from checkers_engine_move_cache import LegalMoveCache
+from checkers_engine_search import MAX_SEARCH_DEPTH, alpha_beta_best_move_search
+
+DEFAULT_SERVER_HOST = "127.0.0.1"
+DEFAULT_SERVER_PORT = 8765
+
+PLAYER_COLORS = {
+    "black": BLACK_PIECE,
+    "red": RED_PIECE
+}
+
+NO_MOVE = "-"
+
+# WORKER FUNCTIONS:
+
+# Every worker process keeps one transposition table, move ordering and legal move cache for all
+# the searches it runs. They are shared by every session whose searches land on the worker, which
+# is safe since their entries only depend on the position.
+
+WORKER_TRANSPOSITION_TABLE = None
+WORKER_MOVE_ORDERING = None
+WORKER_LEGAL_MOVE_CACHE = None
+
+def initialize_server_worker():
+    global WORKER_TRANSPOSITION_TABLE, WORKER_MOVE_ORDERING, WORKER_LEGAL_MOVE_CACHE
+    WORKER_TRANSPOSITION_TABLE = TranspositionTable()
+    WORKER_MOVE_ORDERING = MoveOrdering()
+    WORKER_LEGAL_MOVE_CACHE = LegalMoveCache()
+
+def search_server_move(encoded_board_position, F_piece_color, time_limit, max_depth):
+    search_result = alpha_beta_best_move_search(decode_board_position(encoded_board_position),
+                                                F_piece_color, OPPOSING_PIECE_COLORS[F_piece_color],
+                                                max_depth=max_depth,
+                                                transposition_table=WORKER_TRANSPOSITION_TABLE,
+                                                move_ordering=WORKER_MOVE_ORDERING,
+                                                time_limit=time_limit,
+                                                legal_move_cache=WORKER_LEGAL_MOVE_CACHE)
+    return search_result.best_move
+
+# GAME SESSION OBJECT:
+
+class GameSession:
+    def __init__(self):
+        self.board_position = generate_starting_position()
+        self.piece_color = BLACK_PIECE
+        self.player_color = BLACK_PIECE
+        self.start_position = None
+        self.game_moves = []
+        self.turn_move_cache = TurnMoveCache()
+
+    def start_game(self, player_color, board_position, piece_color, start_position=None):
+        self.board_position = board_position
+        self.piece_color = piece_color
+        self.player_color = player_color
+        self.start_position = start_position
+        self.game_moves = []
+
+    def get_legal_moves(self):
+        return self.turn_move_cache.get_legal_moves(self.board_position, self.piece_color)
+
+    # Returns BLACK_WIN or RED_WIN once the side to move has no legal move, and None before that.
+
+    def get_game_result(self):
+        if self.turn_move_cache.has_legal_move(self.board_position, self.piece_color):
+            return None
+        return RED_WIN if self.piece_color == BLACK_PIECE else BLACK_WIN
+
+    def get_status(self):
+        return PDN_RESULT_STRINGS[self.get_game_result()]
+
+    def play_move(self, move):
+        update_board_position(move, self.board_position)
+        self.game_moves.append(move)
+        self.piece_color = OPPOSING_PIECE_COLORS[self.piece_color]
+
+    def format_position(self):
+        return format_fen_position(self.board_position, self.piece_color)
+
+    def save_state(self):
+        return (list(self.board_position), self.piece_color, self.player_color,
+                self.start_position, list(self.game_moves))
+
+    def restore_state(self, session_state):
+        board_position, self.piece_color, self.player_color, self.start_position, game_moves = \
+            session_state
+        self.board_position = list(board_position)
+        self.game_moves = list(game_moves)
+
+# SERVER OBJECT:
+
+class GameServer:
+    def __init__(self, search_pool, engine_time_limit=DEFAULT_ENGINE_TIME_LIMIT,
+                 max_depth=MAX_SEARCH_DEPTH, opening_book=None, game_record_path=None):
+        self.search_pool = search_pool
+        self.engine_time_limit = engine_time_limit
+        self.max_depth = max_depth
+        self.opening_book = opening_book
+        self.game_record_path = game_record_path
+        self.active_sessions = 0
+        self.session_count = 0
+        self.engine_move_count = 0
+
+    # Book moves are looked up right here (a probe is only a few memory reads), and every other
+    # engine move is searched in the process pool.
+
+    async def choose_engine_move(self, game_session):
+        legal_moves = game_session.get_legal_moves()
+        if self.opening_book is not None:
+            book_move = self.opening_book.probe(game_session.board_position,
+                                                game_session.piece_color, legal_moves)
+            if book_move is not None:
+                return book_move
+        if len(legal_moves) == 1:
+            return legal_moves[0]
+        event_loop = asyncio.get_running_loop()
+        return await event_loop.run_in_executor(self.search_pool, search_server_move,
+                                                encode_board_position(game_session.board_position),
+                                                game_session.piece_color, self.engine_time_limit,
+                                                self.max_depth)
+
+    # Plays the engine's move if it is the engine's turn and the game isn't over, and returns the
+    # PLAYED answer.
+
+    async def answer_with_engine_move(self, game_session, player_move_string):
+        engine_move_string = NO_MOVE
+        if game_session.piece_color != game_session.player_color and \
+           game_session.get_game_result() is None:
+            engine_move = await self.choose_engine_move(game_session)
+            game_session.play_move(engine_move)
+            engine_move_string = format_pdn_move(engine_move)
+            self.engine_move_count += 1
+        game_status = game_session.get_status()
+        if game_status != PDN_RESULT_STRINGS[None] and self.game_record_path is not None:
+            append_pdn_game(self.game_record_path, game_session.game_moves,
+                            game_session.get_game_result(),
+                            start_position=game_session.start_position)
+        return f"PLAYED {player_move_string} {engine_move_string} {game_status} " \
+               f"{game_session.format_position()}"
+
+    async def answer_new_command(self, game_session, arguments):
+        player_color = PLAYER_COLORS.get(arguments[0].lower() if arguments else "black")
+        if player_color is None:
+            raise ValueError(f"unknown color {arguments[0]!r} (use black or red)")
+        if len(arguments) > 1:
+            board_position, piece_color = parse_fen_position(arguments[1])
+            start_position = (list(board_position), piece_color)
+        else:
+            board_position, piece_color = (generate_starting_position(), BLACK_PIECE)
+            start_position = None
+        game_session.start_game(player_color, board_position, piece_color, start_position)
+        return await self.answer_with_engine_move(game_session, NO_MOVE)
+
+    async def answer_move_command(self, game_session, arguments):
+        if len(arguments) != 1 or not MOVE_PATTERN.fullmatch(arguments[0]):
+            raise ValueError("usage: MOVE <move>, such as MOVE 11-15 or MOVE 15x24")
+        if game_session.get_game_result() is not None:
+            raise ValueError("the game is over")
+        if game_session.piece_color != game_session.player_color:
+            raise ValueError("it is not your turn")
+        player_move = parse_pdn_move(arguments[0], game_session.get_legal_moves())
+        game_session.play_move(player_move)
+        return await self.answer_with_engine_move(game_session, format_pdn_move(player_move))
+
+    async def answer_command(self, game_session, command_line):
+        command_words = command_line.split()
+        command = command_words[0].upper()
+        arguments = command_words[1:]
+        if command == "NEW":
+            return await self.answer_new_command(game_session, arguments)
+        if command == "MOVE":
+            return await self.answer_move_command(game_session, arguments)
+        if command == "MOVES":
+            player_moves = game_session.get_legal_moves() \
+                if game_session.piece_color == game_session.player_color else ()
+            return " ".join(["MOVES"] + [format_pdn_move(move) for move in player_moves])
+        if command == "POSITION":
+            return f"POSITION {game_session.get_status()} {game_session.format_position()}"
+        raise ValueError(f"unknown command {command!r}")
+
+    async def handle_connection(self, reader, writer):
+        game_session = GameSession()
+        self.active_sessions += 1
+        self.session_count += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command_line = line.decode("ascii", errors="replace").strip()
+                if not command_line:
+                    continue
+                if command_line.upper() == "QUIT":
+                    writer.write(b"BYE\n")
+                    await writer.drain()
+                    break
+                # Any other exception is a bug (or a failed search), which still only fails the
+                # one command: the session is put back the way it was and stays open.
+                session_state = game_session.save_state()
+                try:
+                    answer = await self.answer_command(game_session, command_line)
+                except ValueError as error:
+                    answer = f"ERROR {error}"
+                except Exception as error:
+                    game_session.restore_state(session_state)
+                    answer = f"ERROR internal error ({type(error).__name__}: {error})"
+                writer.write(answer.encode("ascii", errors="replace") + b"\n")
+                await writer.drain()
+        # A ValueError here means the client sent a line longer than the stream reader's limit.
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self.active_sessions -= 1
+            writer.close()
+
+# Serves on a Unix socket if unix_socket_path is given, and on TCP otherwise. Runs until it is
+# cancelled (Ctrl-C from the command line).
+
+async def run_game_server(host=DEFAULT_SERVER_HOST, port=DEFAULT_SERVER_PORT, unix_socket_path=None,
+                          worker_count=None, engine_time_limit=DEFAULT_ENGINE_TIME_LIMIT,
+                          max_depth=MAX_SEARCH_DEPTH, opening_book_path=DEFAULT_OPENING_BOOK_PATH,
+                          game_record_path=None):
+    if worker_count is None:
+        worker_count = os.cpu_count() or 1
+    opening_book = open_opening_book(opening_book_path)
+    with ProcessPoolExecutor(max_workers=worker_count,
+                             initializer=initialize_server_worker) as search_pool:
+        game_server = GameServer(search_pool, engine_time_limit, max_depth, opening_book,
+                                 game_record_path)
+        if unix_socket_path is not None:
+            server = await asyncio.start_unix_server(game_server.handle_connection,
+                                                     path=unix_socket_path)
+            print(f"Serving on {unix_socket_path}", flush=True)
+        else:
+            server = await asyncio.start_server(game_server.handle_connection, host, port)
+            print(f"Serving on {host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+# Example: checkers_engine_server.py --port 8765 --time-limit 0.5 --workers 4
+# (or --unix /tmp/checkers.sock to serve on a Unix socket)
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="Serve games against the engine.")
+    argument_parser.add_argument("--host", default=DEFAULT_SERVER_HOST)
+    argument_parser.add_argument("--port", type=int, default=DEFAULT_SERVER_PORT)
+    argument_parser.add_argument("--unix", default=None, help="serve on this Unix socket path")
+    argument_parser.add_argument("--workers", type=int, default=None)
+    argument_parser.add_argument("--time-limit", type=float, default=DEFAULT_ENGINE_TIME_LIMIT,
+                                 help="seconds per engine move")
+    argument_parser.add_argument("--depth", type=int, default=MAX_SEARCH_DEPTH,
+                                 help="maximum search depth per engine move")
+    argument_parser.add_argument("--book", default=DEFAULT_OPENING_BOOK_PATH)
+    argument_parser.add_argument("--record", default=None,
+                                 help="append every finished game to this PDN file")
+    arguments = argument_parser.parse_args()
+    try:
+        asyncio.run(run_game_server(arguments.host, arguments.port, arguments.unix,
+                                    arguments.workers, arguments.time_limit, arguments.depth,
+                                    arguments.book, arguments.record))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+
+# ENDGAME TABLEBASE GENERATOR AND PROBER
+
+# A tablebase stores the exact result (win, loss or draw for the side to move) and the distance
+# to that result in plies for every position with up to a given number of pieces. It is built
+# offline by retrograde analysis: the positions where the side to move has no legal moves are
+# losses in 0, every position with a move into a loss in d is a win in d + 1, and every position
+# whose moves all lead to wins for the opponent is a loss in 1 + (the longest of those wins).
+# Working backwards from the finished games this way settles every won and lost position, and
+# whatever is left over at the end is a draw.
+
+# The results are written to a flat binary file with one 16-bit value per position index, and
+# the engine reads single entries through mmap, so the file never has to be loaded into memory.
+
+import mmap
+import struct
+import sys
+import time
+from array import array
+from itertools import combinations, product
+from math import comb
+
+from checkers_engine_mechanics import (
+    BLACK_PIECE, RED_PIECE, BLACK_KING, RED_KING, ON_BACK_RANK,
+    VERTICAL_SEARCH_DIRECTIONS, OPPOSING_PIECE_COLORS,
+    generate_empty_board, list_all_possible_moves, apply_move, undo_move
+)
+
+# TABLEBASE INDEX CONSTANTS:
+
+# A position index is made of four parts: the number of pieces k, the set of occupied squares
+# (ranked with the combinatorial number system), the piece type on each occupied square (a
+# base 4 number with one digit per piece, in coordinate order) and the side to move.
+
+PIECE_TYPES = (BLACK_PIECE, BLACK_KING, RED_PIECE, RED_KING)
+
+PIECE_TYPE_DIGITS = {
+    BLACK_PIECE: 0,
+    BLACK_KING: 1,
+    RED_PIECE: 2,
+    RED_KING: 3
+}
+
+SIDE_TO_MOVE_DIGITS = {
+    BLACK_PIECE: 0,
+    RED_PIECE: 1
+}
+
+SIDES_TO_MOVE = (BLACK_PIECE, RED_PIECE)
+
+def calculate_positions_with_piece_count(piece_count):
+    return comb(32, piece_count) * 4 ** piece_count * 2
+
+def calculate_index_offsets():
+    index_offsets = [0, 0]
+    for piece_count in range(1, 33):
+        index_offsets.append(index_offsets[-1] + calculate_positions_with_piece_count(piece_count))
+    return tuple(index_offsets)
+
+# Note: INDEX_OFFSETS[k] is the first index used by positions with k pieces, and
+# INDEX_OFFSETS[k + 1] is the total number of indices for a tablebase of up to k pieces.
+
+INDEX_OFFSETS = calculate_index_offsets()
+
+# TABLEBASE VALUE CONSTANTS:
+
+# Stored values are signed 16-bit numbers: 0 is a draw, a positive value v is a win in v plies
+# and a negative value v is a loss in (-v - 1) plies (so that a loss in 0 is not confused with a
+# draw).
+
+TABLEBASE_DRAW = 0
+TABLEBASE_WIN = 1
+TABLEBASE_LOSS = -1
+
+def encode_tablebase_value(result, plies):
+    if result == TABLEBASE_WIN:
+        return plies
+    elif result == TABLEBASE_LOSS:
+        return -plies - 1
+    return 0
+
+def decode_tablebase_value(tablebase_value):
+    if tablebase_value > 0:
+        return (TABLEBASE_WIN, tablebase_value)
+    elif tablebase_value < 0:
+        return (TABLEBASE_LOSS, -tablebase_value - 1)
+    return (TABLEBASE_DRAW, 0)
+
+# TABLEBASE FILE CONSTANTS:
+
+TABLEBASE_MAGIC = b"CKTB"
+TABLEBASE_VERSION = 1
+HEADER_FORMAT = "<4sHH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+VALUE_FORMAT = "<h"
+VALUE_SIZE = struct.calcsize(VALUE_FORMAT)
+
+# POSITION INDEX FUNCTIONS:
+
+def get_tablebase_index(board_position, piece_color, max_pieces):
+    square_rank = 0
+    piece_type_number = 0
+    piece_count = 0
+    for square_index in range(32):
+        piece_value = board_position[square_index] & ~ON_BACK_RANK
+        if piece_value:
+            piece_count += 1
+            if piece_count > max_pieces:
+                return None
+            square_rank += comb(square_index, piece_count)
+            piece_type_number = piece_type_number * 4 + PIECE_TYPE_DIGITS[piece_value]
+    if piece_count == 0:
+        return None
+    return INDEX_OFFSETS[piece_count] + \
+           ((square_rank * 4 ** piece_count + piece_type_number) * 2 +
+            SIDE_TO_MOVE_DIGITS[piece_color])
+
+# A pawn can never stand on the row where it would be promoted, so those piece placements are
+# skipped (their indices are left as draws and are never probed).
+
+def is_valid_piece_placement(square_indices, piece_types):
+    for square_index, piece_value in zip(square_indices, piece_types):
+        if piece_value == BLACK_PIECE and square_index >= 28:
+            return False
+        if piece_value == RED_PIECE and square_index < 4:
+            return False
+    return True
+
+# Yields (board position, side to move) for every index from 0 up to the last index of a
+# tablebase with max_pieces pieces, in index order, so the caller can count indices instead of
+# computing them. Invalid placements are yielded as (None, side to move).
+
+# Note: square sets are ranked in colexicographic order (sorted by their highest square first),
+# which is the order that matches the combinatorial ranking in get_tablebase_index.
+
+def enumerate_tablebase_positions(max_pieces):
+    for piece_count in range(1, max_pieces + 1):
+        square_sets = sorted(combinations(range(32), piece_count),
+                             key=lambda square_indices: square_indices[::-1])
+        for square_indices in square_sets:
+            for piece_types in product(PIECE_TYPES, repeat=piece_count):
+                if is_valid_piece_placement(square_indices, piece_types):
+                    board_position = generate_empty_board()
+                    for square_index, piece_value in zip(square_indices, piece_types):
+                        board_position[square_index] |= piece_value
+                else:
+                    board_position = None
+                for piece_color in SIDES_TO_MOVE:
+                    yield (board_position, piece_color)
+
+# RETROGRADE ANALYSIS FUNCTIONS:
+
+# The move graph is stored in flat arrays (the successor indices of every position back to back,
+# plus the offset where each position's successors start, and the same again for predecessors)
+# instead of one Python list per position. This keeps memory use reasonable for the hundreds of
+# thousands of positions in even a small tablebase.
+
+def build_successor_graph(max_pieces):
+    successor_starts = array("q")
+    successor_indices = array("l")
+    valid_positions = bytearray()
+    for board_position, piece_color in enumerate_tablebase_positions(max_pieces):
+        successor_starts.append(len(successor_indices))
+        if board_position is None:
+            valid_positions.append(0)
+            continue
+        valid_positions.append(1)
+        E_piece_color = OPPOSING_PIECE_COLORS[piece_color]
+        for move in list_all_possible_moves(board_position, piece_color,
+                                            VERTICAL_SEARCH_DIRECTIONS[piece_color]):
+            undo_record = apply_move(move, board_position)
+            successor_indices.append(get_tablebase_index(board_position, E_piece_color,
+                                                         max_pieces))
+            undo_move(undo_record, board_position)
+    successor_starts.append(len(successor_indices))
+    return (successor_starts, successor_indices, valid_positions)
+
+def build_predecessor_graph(successor_starts, successor_indices):
+    index_count = len(successor_starts) - 1
+    predecessor_starts = array("q", [0]) * (index_count + 1)
+    for successor_index in successor_indices:
+        predecessor_starts[successor_index + 1] += 1
+    for tablebase_index in range(index_count):
+        predecessor_starts[tablebase_index + 1] += predecessor_starts[tablebase_index]
+    fill_positions = array("q", predecessor_starts)
+    predecessor_indices = array("l", [0]) * len(successor_indices)
+    for tablebase_index in range(index_count):
+        for edge in range(successor_starts[tablebase_index], successor_starts[tablebase_index + 1]):
+            successor_index = successor_indices[edge]
+            predecessor_indices[fill_positions[successor_index]] = tablebase_index
+            fill_positions[successor_index] += 1
+    return (predecessor_starts, predecessor_indices)
+
+# Note: positions are settled in order of distance (a first-in, first-out queue), so the first
+# loss found among a position's moves gives the shortest win, and the last of its moves to be
+# settled as a win gives the longest loss.
+
+def run_retrograde_analysis(max_pieces):
+    successor_starts, successor_indices, valid_positions = build_successor_graph(max_pieces)
+    predecessor_starts, predecessor_indices = \
+        build_predecessor_graph(successor_starts, successor_indices)
+    index_count = len(valid_positions)
+    tablebase_values = array("h", [0]) * index_count
+    resolved = bytearray(index_count)
+    unresolved_move_counts = array("h", [0]) * index_count
+    settled_queue = array("l")
+    for tablebase_index in range(index_count):
+        if not valid_positions[tablebase_index]:
+            resolved[tablebase_index] = 1
+            continue
+        move_count = successor_starts[tablebase_index + 1] - successor_starts[tablebase_index]
+        unresolved_move_counts[tablebase_index] = move_count
+        if move_count == 0:
+            tablebase_values[tablebase_index] = encode_tablebase_value(TABLEBASE_LOSS, 0)
+            resolved[tablebase_index] = 1
+            settled_queue.append(tablebase_index)
+    queue_position = 0
+    while queue_position < len(settled_queue):
+        settled_index = settled_queue[queue_position]
+        queue_position += 1
+        settled_result, settled_plies = decode_tablebase_value(tablebase_values[settled_index])
+        for edge in range(predecessor_starts[settled_index], predecessor_starts[settled_index + 1]):
+            predecessor_index = predecessor_indices[edge]
+            if resolved[predecessor_index]:
+                continue
+            if settled_result == TABLEBASE_LOSS:
+                tablebase_values[predecessor_index] = \
+                    encode_tablebase_value(TABLEBASE_WIN, settled_plies + 1)
+                resolved[predecessor_index] = 1
+                settled_queue.append(predecessor_index)
+            else:
+                unresolved_move_counts[predecessor_index] -= 1
+                if unresolved_move_counts[predecessor_index] == 0:
+                    tablebase_values[predecessor_index] = \
+                        encode_tablebase_value(TABLEBASE_LOSS, settled_plies + 1)
+                    resolved[predecessor_index] = 1
+                    settled_queue.append(predecessor_index)
+    return tablebase_values
+
+# TABLEBASE FILE FUNCTIONS:
+
+def write_tablebase_file(tablebase_path, max_pieces, tablebase_values):
+    if sys.byteorder != "little":
+        tablebase_values = array("h", tablebase_values)
+        tablebase_values.byteswap()
+    with open(tablebase_path, "wb") as tablebase_file:
+        tablebase_file.write(struct.pack(HEADER_FORMAT, TABLEBASE_MAGIC, TABLEBASE_VERSION,
+                                         max_pieces))
+        tablebase_values.tofile(tablebase_file)
+
+def generate_tablebase(tablebase_path, max_pieces):
+    tablebase_values = run_retrograde_analysis(max_pieces)
+    write_tablebase_file(tablebase_path, max_pieces, tablebase_values)
+    return len(tablebase_values)
+
+# TABLEBASE PROBING:
+
+# The file is memory-mapped read-only, so the operating system only pages in the parts of the
+# file that are actually probed.
+
+class Tablebase:
+    def __init__(self, tablebase_path):
+        self.tablebase_file = open(tablebase_path, "rb")
+        self.tablebase_map = mmap.mmap(self.tablebase_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, max_pieces = struct.unpack_from(HEADER_FORMAT, self.tablebase_map, 0)
+        if magic != TABLEBASE_MAGIC or version != TABLEBASE_VERSION:
+            self.close()
+            raise ValueError(f"{tablebase_path} is not a version {TABLEBASE_VERSION} tablebase")
+        self.max_pieces = max_pieces
+        self.probes = 0
+        self.hits = 0
+
+    # Returns (result, plies) for the side to move, or None if the position has more pieces than
+    # the tablebase covers.
+
+    def probe(self, board_position, piece_color):
+        self.probes += 1
+        tablebase_index = get_tablebase_index(board_position, piece_color, self.max_pieces)
+        if tablebase_index is None:
+            return None
+        self.hits += 1
+        tablebase_value = struct.unpack_from(VALUE_FORMAT, self.tablebase_map,
+                                             HEADER_SIZE + tablebase_index * VALUE_SIZE)[0]
+        return decode_tablebase_value(tablebase_value)
+
+    def close(self):
+        self.tablebase_map.close()
+        self.tablebase_file.close()
+
+# Usage: checkers_engine_tablebase.py [max pieces] [tablebase path]
+
+if __name__ == "__main__":
+    generation_max_pieces = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    generation_path = sys.argv[2] if len(sys.argv) > 2 else f"checkers_{generation_max_pieces}_piece.tb"
+    start_time = time.perf_counter()
+    position_count = generate_tablebase(generation_path, generation_max_pieces)
+    print(f"Wrote {position_count} positions to {generation_path} "
+          f"in {time.perf_counter() - start_time:.1f}s")
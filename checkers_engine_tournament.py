@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+
+# HEADLESS ENGINE-VS-ENGINE TOURNAMENT RUNNER
+
+# Plays many engine-vs-engine games without any input() or board printing, spread over a process
+# pool, and reports the match result together with search speed (nodes per second), time per
+# move and game length. This is how engine changes are measured for strength per CPU-second.
+
+# Games are played in pairs: both games of a pair start from the same randomized opening, with
+# the engines swapping colors, so neither engine profits from a lucky opening.
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from checkers_engine_mechanics import (
+    BLACK_PIECE, RED_PIECE, VERTICAL_SEARCH_DIRECTIONS, OPPOSING_PIECE_COLORS,
+    generate_starting_position, list_all_possible_moves, apply_move, minmax_best_move_search
+)
+from checkers_engine_hashing import TranspositionTable
+from checkers_engine_move_ordering import MoveOrdering
+from checkers_engine_move_cache import LegalMoveCache
+from checkers_engine_search import alpha_beta_best_move_search
+from checkers_engine_opening_book import BLACK_WIN, DRAW, RED_WIN
+
+DEFAULT_MAX_GAME_PLIES = 200
+
+# ENGINE FUNCTIONS:
+
+# An engine configuration is a dict with a "name", a "type" (one of the keys of ENGINE_TYPES) and
+# any settings that engine type uses (such as "depth"). Every engine function returns
+# (move, nodes searched), with None for the nodes when the engine doesn't count them.
+
+def choose_random_engine_move(engine_config, engine_state, board_position, F_piece_color,
+                              legal_moves):
+    return (engine_state["move_generator"].choice(legal_moves), None)
+
+def choose_minmax_engine_move(engine_config, engine_state, board_position, F_piece_color,
+                              legal_moves):
+    move_search_info = minmax_best_move_search(board_position, F_piece_color,
+                                               OPPOSING_PIECE_COLORS[F_piece_color])
+    return (move_search_info[0], None)
+
+def choose_alpha_beta_engine_move(engine_config, engine_state, board_position, F_piece_color,
+                                  legal_moves):
+    search_result = alpha_beta_best_move_search(board_position, F_piece_color,
+                                                OPPOSING_PIECE_COLORS[F_piece_color],
+                                                max_depth=engine_config.get("depth", 6),
+                                                node_limit=engine_config.get("node_limit"),
+                                                transposition_table=engine_state["transposition_table"],
+                                                move_ordering=engine_state["move_ordering"],
+                                                legal_move_cache=engine_state["legal_move_cache"])
+    return (search_result.best_move, search_result.nodes)
+
+ENGINE_TYPES = {
+    "random": choose_random_engine_move,
+    "minmax": choose_minmax_engine_move,
+    "alphabeta": choose_alpha_beta_engine_move
+}
+
+def create_engine_state(engine_config, seed):
+    return {
+        "move_generator": random.Random(seed),
+        "transposition_table": TranspositionTable(engine_config.get("hash_size", 1 << 16)),
+        "move_ordering": MoveOrdering(),
+        "legal_move_cache": LegalMoveCache(engine_config.get("move_cache_size", 1 << 14))
+    }
+
+# HEADLESS GAME FUNCTIONS:
+
+# Plays one game and returns its statistics. The first random_opening_plies moves are picked at
+# random from the opening seed, and the game is a draw if it reaches max_game_plies.
+
+def play_headless_game(black_engine_config, red_engine_config, random_opening_plies,
+                       opening_seed, max_game_plies=DEFAULT_MAX_GAME_PLIES):
+    board_position = generate_starting_position()
+    opening_move_generator = random.Random(opening_seed)
+    engine_configs = {BLACK_PIECE: black_engine_config, RED_PIECE: red_engine_config}
+    engine_states = {BLACK_PIECE: create_engine_state(black_engine_config, opening_seed),
+                     RED_PIECE: create_engine_state(red_engine_config, opening_seed + 1)}
+    side_statistics = {piece_color: {"moves": 0, "nodes": 0, "counted_nodes": False, "time": 0.0}
+                       for piece_color in (BLACK_PIECE, RED_PIECE)}
+    piece_color = BLACK_PIECE
+    game_result = DRAW
+    plies = 0
+    while plies < max_game_plies:
+        legal_moves = list_all_possible_moves(board_position, piece_color,
+                                              VERTICAL_SEARCH_DIRECTIONS[piece_color])
+        if not legal_moves:
+            game_result = RED_WIN if piece_color == BLACK_PIECE else BLACK_WIN
+            break
+        if plies < random_opening_plies:
+            move = opening_move_generator.choice(legal_moves)
+        else:
+            engine_config = engine_configs[piece_color]
+            start_time = time.perf_counter()
+            move, nodes = ENGINE_TYPES[engine_config["type"]](engine_config,
+                                                              engine_states[piece_color],
+                                                              board_position, piece_color,
+                                                              legal_moves)
+            statistics = side_statistics[piece_color]
+            statistics["time"] += time.perf_counter() - start_time
+            statistics["moves"] += 1
+            if nodes is not None:
+                statistics["nodes"] += nodes
+                statistics["counted_nodes"] = True
+        apply_move(move, board_position)
+        piece_color = OPPOSING_PIECE_COLORS[piece_color]
+        plies += 1
+    return {
+        "result": game_result,
+        "plies": plies,
+        "black": side_statistics[BLACK_PIECE],
+        "red": side_statistics[RED_PIECE]
+    }
+
+# Game specs are plain tuples so they are cheap to send to the worker processes:
+# (game number, engine A plays black, opening seed)
+
+def play_tournament_game(game_spec, engine_a_config, engine_b_config, random_opening_plies,
+                         max_game_plies):
+    game_number, engine_a_is_black, opening_seed = game_spec
+    if engine_a_is_black:
+        game_statistics = play_headless_game(engine_a_config, engine_b_config,
+                                             random_opening_plies, opening_seed, max_game_plies)
+    else:
+        game_statistics = play_headless_game(engine_b_config, engine_a_config,
+                                             random_opening_plies, opening_seed, max_game_plies)
+    game_statistics["game_number"] = game_number
+    game_statistics["engine_a_is_black"] = engine_a_is_black
+    return game_statistics
+
+def play_tournament_game_from_arguments(game_arguments):
+    return play_tournament_game(*game_arguments)
+
+# TOURNAMENT FUNCTIONS:
+
+def create_engine_summary():
+    return {"wins": 0, "draws": 0, "losses": 0, "moves": 0, "nodes": 0, "node_time": 0.0,
+            "time": 0.0}
+
+def add_side_statistics_to_summary(engine_summary, side_statistics):
+    engine_summary["moves"] += side_statistics["moves"]
+    engine_summary["time"] += side_statistics["time"]
+    if side_statistics["counted_nodes"]:
+        engine_summary["nodes"] += side_statistics["nodes"]
+        engine_summary["node_time"] += side_statistics["time"]
+
+def finish_engine_summary(engine_summary):
+    if engine_summary["node_time"] > 0:
+        engine_summary["nodes_per_second"] = engine_summary["nodes"] / engine_summary["node_time"]
+    else:
+        engine_summary["nodes_per_second"] = None
+    if engine_summary["moves"] > 0:
+        engine_summary["time_per_move"] = engine_summary["time"] / engine_summary["moves"]
+    else:
+        engine_summary["time_per_move"] = None
+    del engine_summary["node_time"]
+    return engine_summary
+
+def run_tournament(engine_a_config, engine_b_config, game_count, worker_count=None,
+                   random_opening_plies=4, seed=0, max_game_plies=DEFAULT_MAX_GAME_PLIES):
+    if worker_count is None:
+        worker_count = os.cpu_count() or 1
+    game_arguments = [((game_number, game_number % 2 == 0, seed + game_number // 2),
+                       engine_a_config, engine_b_config, random_opening_plies, max_game_plies)
+                      for game_number in range(game_count)]
+    engine_summaries = {"a": create_engine_summary(), "b": create_engine_summary()}
+    total_plies = 0
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=worker_count) as tournament_pool:
+        for game_statistics in tournament_pool.map(play_tournament_game_from_arguments,
+                                                    game_arguments):
+            total_plies += game_statistics["plies"]
+            if game_statistics["engine_a_is_black"]:
+                engine_a_side, engine_b_side = ("black", "red")
+                engine_a_result = game_statistics["result"]
+            else:
+                engine_a_side, engine_b_side = ("red", "black")
+                engine_a_result = -game_statistics["result"]
+            add_side_statistics_to_summary(engine_summaries["a"], game_statistics[engine_a_side])
+            add_side_statistics_to_summary(engine_summaries["b"], game_statistics[engine_b_side])
+            if engine_a_result == BLACK_WIN:
+                engine_summaries["a"]["wins"] += 1
+                engine_summaries["b"]["losses"] += 1
+            elif engine_a_result == RED_WIN:
+                engine_summaries["a"]["losses"] += 1
+                engine_summaries["b"]["wins"] += 1
+            else:
+                engine_summaries["a"]["draws"] += 1
+                engine_summaries["b"]["draws"] += 1
+    return {
+        "games": game_count,
+        "worker_count": worker_count,
+        "wall_time": time.perf_counter() - start_time,
+        "average_game_plies": total_plies / game_count if game_count else 0,
+        engine_a_config["name"]: finish_engine_summary(engine_summaries["a"]),
+        engine_b_config["name"]: finish_engine_summary(engine_summaries["b"])
+    }
+
+# COMMAND LINE INTERFACE:
+
+def parse_engine_config(engine_description):
+    engine_type, _, depth = engine_description.partition(":")
+    if engine_type not in ENGINE_TYPES:
+        raise argparse.ArgumentTypeError(f"unknown engine type {engine_type!r}")
+    engine_config = {"name": engine_description, "type": engine_type}
+    if depth:
+        engine_config["depth"] = int(depth)
+    return engine_config
+
+def print_tournament_report(tournament_report):
+    for report_key, report_value in tournament_report.items():
+        if isinstance(report_value, dict):
+            print(f"\n{report_key}:")
+            for summary_key, summary_value in report_value.items():
+                print(f"  {summary_key}: {summary_value}")
+        else:
+            print(f"{report_key}: {report_value}")
+
+# Example: checkers_engine_tournament.py alphabeta:6 alphabeta:4 --games 200 --workers 8
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="Play a headless engine-vs-engine match.")
+    argument_parser.add_argument("engine_a", type=parse_engine_config,
+                                 help="engine type and optional depth, such as alphabeta:6")
+    argument_parser.add_argument("engine_b", type=parse_engine_config,
+                                 help="engine type and optional depth, such as minmax or random")
+    argument_parser.add_argument("--games", type=int, default=20)
+    argument_parser.add_argument("--workers", type=int, default=None)
+    argument_parser.add_argument("--opening-plies", type=int, default=4)
+    argument_parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_GAME_PLIES)
+    argument_parser.add_argument("--seed", type=int, default=0)
+    arguments = argument_parser.parse_args()
+    if arguments.engine_a["name"] == arguments.engine_b["name"]:
+        arguments.engine_b["name"] += " (b)"
+    print_tournament_report(run_tournament(arguments.engine_a, arguments.engine_b, arguments.games,
+                                           arguments.workers, arguments.opening_plies,
+                                           arguments.seed, arguments.max_plies))